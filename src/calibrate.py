@@ -0,0 +1,178 @@
+import argparse
+import json
+import math
+import multiprocessing
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+from mcts.exact_solver import ExactSolver
+from mcts.mcts_engine import MCTSEngine
+from games.all_list import win_first_move_games
+
+# One solver per game per worker process, so its cache is shared across trials
+_solvers: Dict[str, ExactSolver] = {}
+
+def get_solver(game_name: str) -> ExactSolver:
+    if game_name not in _solvers:
+        _solvers[game_name] = ExactSolver()
+    return _solvers[game_name]
+
+def num_trials_for(confidence: float, max_error_rate: float) -> int:
+    """
+    Number of consecutive error-free trials needed to conclude, at the given
+    confidence, that the per-game error rate is below max_error_rate.
+    """
+    return math.ceil(math.log(1 - confidence) / math.log(1 - max_error_rate))
+
+def run_trial(
+        game_index: int,
+        budget: int,
+        trial: int,
+        opponent: str,
+        reference_iterations: int,
+        blunder_rate: float,
+    ) -> Tuple[int, int, bool, float]:
+    """
+    Plays one game of MCTS with the given budget against the opponent.
+
+    With the exact opponent, MCTS alternates seats between trials. When it
+    plays second, the opponent plays a random move with probability
+    blunder_rate, so that MCTS gets won positions it must convert. A trial
+    fails if MCTS ever moves from a won position to a position that is not won.
+
+    With the reference MCTS opponent, MCTS plays first and a trial fails
+    if it does not win.
+
+    Returns (game_index, budget, passed, cpu seconds spent by the MCTS under test).
+    """
+    random.seed(hash((game_index, budget, trial)))
+    game_config = win_first_move_games[game_index]
+    state = game_config.game_class()
+    mcts_player = trial % 2 if opponent == "exact" else 0
+    solver = get_solver(game_config.name) if opponent == "exact" else None
+
+    cpu_time = 0.0
+    while not state.is_terminal():
+        if state.get_player_to_move() == mcts_player:
+            start = time.process_time()
+            action = MCTSEngine().search(state, budget)
+            cpu_time += time.process_time() - start
+            if solver is not None and solver.value(state) == 1.0:
+                if solver.action_value(state, action) != 1.0:
+                    return game_index, budget, False, cpu_time
+        elif solver is not None:
+            if random.random() < blunder_rate:
+                action = random.choice(state.get_legal_actions())
+            else:
+                action = solver.get_action(state)
+        else:
+            action = MCTSEngine().search(state, reference_iterations)
+        state = state.take_action(action)
+
+    if solver is None and state.get_result()[mcts_player] != 1.0:
+        return game_index, budget, False, cpu_time
+    return game_index, budget, True, cpu_time
+
+def _run_trial(args):
+    return run_trial(*args)
+
+def candidate_budgets(current: int, num_candidates: int, min_budget: int) -> List[int]:
+    """Current budget, then repeatedly halved down to min_budget"""
+    budgets = [current]
+    while len(budgets) < num_candidates and budgets[-1] // 2 >= min_budget:
+        budgets.append(budgets[-1] // 2)
+    return sorted(budgets)
+
+def recommend(budgets: List[int], passed: Dict[int, bool]) -> Optional[int]:
+    """Smallest budget such that it and every larger candidate played perfectly"""
+    recommended = None
+    for budget in sorted(budgets, reverse=True):
+        if not passed[budget]:
+            break
+        recommended = budget
+    return recommended
+
+def main():
+    parser = argparse.ArgumentParser(description='Find the smallest MCTS budget that plays each game perfectly')
+    parser.add_argument('--games', type=str, nargs='*', help='Names of games to calibrate (default: all in games/all_list.py)')
+    parser.add_argument('--opponent', type=str, choices=['exact', 'mcts'], default='exact', help='Exact solver, or a high-budget reference MCTS (always used for games the solver cannot handle)')
+    parser.add_argument('--reference_iterations', type=int, default=100000, help='Budget of the reference MCTS opponent')
+    parser.add_argument('--confidence', type=float, default=0.95, help='Confidence that the error rate is below --max_error_rate')
+    parser.add_argument('--max_error_rate', type=float, default=0.05, help='Largest acceptable per-game error rate')
+    parser.add_argument('--blunder_rate', type=float, default=0.5, help='How often the exact opponent plays a random move when moving first')
+    parser.add_argument('--num_candidates', type=int, default=6, help='Number of candidate budgets per game')
+    parser.add_argument('--min_budget', type=int, default=50, help='Smallest candidate budget')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help='Number of worker processes')
+    parser.add_argument('--output', type=str, default='calibration.json', help='Where to write the recommendations')
+    args = parser.parse_args()
+
+    game_indices = [
+        i for i, game_config in enumerate(win_first_move_games)
+        if not args.games or game_config.name in args.games
+    ]
+    # The exact solver would never finish on some games, so they use the reference MCTS
+    opponents = {
+        i: args.opponent if win_first_move_games[i].exact_solvable else 'mcts'
+        for i in game_indices
+    }
+    for i in game_indices:
+        if opponents[i] != args.opponent:
+            print(f"{win_first_move_games[i].name} can't be solved exactly, using the reference MCTS opponent")
+    num_trials = num_trials_for(args.confidence, args.max_error_rate)
+    budgets = {
+        i: candidate_budgets(win_first_move_games[i].mcts_iterations, args.num_candidates, args.min_budget)
+        for i in game_indices
+    }
+    tasks = [
+        (i, budget, trial, opponents[i], args.reference_iterations, args.blunder_rate)
+        for i in game_indices
+        for budget in budgets[i]
+        for trial in range(num_trials)
+    ]
+    print(f"Running {len(tasks)} trials ({num_trials} per budget) on {args.workers} workers")
+
+    passed = {i: {budget: True for budget in budgets[i]} for i in game_indices}
+    cpu_times = {i: {budget: 0.0 for budget in budgets[i]} for i in game_indices}
+    with multiprocessing.Pool(args.workers) as pool:
+        for game_index, budget, trial_passed, cpu_time in pool.imap_unordered(_run_trial, tasks):
+            passed[game_index][budget] &= trial_passed
+            cpu_times[game_index][budget] += cpu_time
+
+    results = []
+    for i in game_indices:
+        game_config = win_first_move_games[i]
+        current = game_config.mcts_iterations
+        recommended = recommend(budgets[i], passed[i])
+        current_cpu = cpu_times[i][current] / num_trials
+        recommended_cpu = cpu_times[i][recommended] / num_trials if recommended is not None else current_cpu
+        results.append({
+            "name": game_config.name,
+            "opponent": opponents[i],
+            "current_mcts_iterations": current,
+            "recommended_mcts_iterations": recommended,
+            "passed": {str(budget): passed[i][budget] for budget in budgets[i]},
+            "cpu_seconds_per_game_current": round(current_cpu, 3),
+            "cpu_seconds_per_game_recommended": round(recommended_cpu, 3),
+            "cpu_seconds_saved_per_game": round(current_cpu - recommended_cpu, 3),
+        })
+
+    with open(args.output, 'w') as f:
+        json.dump({
+            "opponent": args.opponent,
+            "confidence": args.confidence,
+            "max_error_rate": args.max_error_rate,
+            "trials_per_budget": num_trials,
+            "games": results,
+        }, f, indent=2)
+
+    print(f"{'Game':<32}{'Current':>10}{'Recommended':>13}{'CPU s/game saved':>18}")
+    for result in results:
+        recommended = result["recommended_mcts_iterations"]
+        print(f"{result['name']:<32}{result['current_mcts_iterations']:>10}"
+              f"{recommended if recommended is not None else 'FAILED':>13}"
+              f"{result['cpu_seconds_saved_per_game']:>18.3f}")
+    print(f"Wrote recommendations to {args.output}")
+
+if __name__ == "__main__":
+    main()
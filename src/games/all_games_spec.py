@@ -0,0 +1,105 @@
+import random
+
+from games.all_list import win_first_move_games
+from games.book_nim import BookNim
+from games.grundys_game import GrundysGame
+from games.wythofs_nim import WythofsNim
+from games.state_codec import decode, encode
+
+def random_states(game_class, num_games: int = 20):
+    """Yields every state of num_games random playouts"""
+    for _ in range(num_games):
+        state = game_class()
+        yield state
+        while not state.is_terminal():
+            state = state.take_action(random.choice(state.get_legal_actions()))
+            yield state
+
+def test_action_ids_match_actions():
+    random.seed(0)
+    for game_config in win_first_move_games:
+        for state in random_states(game_config.game_class):
+            actions = state.get_legal_actions()
+            action_ids = state.get_legal_action_ids()
+            assert sorted(actions) == sorted(state.id_to_action(i) for i in action_ids)
+            for action in actions:
+                action_id = state.action_to_id(action)
+                assert action_id in action_ids
+                assert str(state.take_action_id(action_id)) == str(state.take_action(action))
+
+def test_status_matches_terminal_and_result():
+    random.seed(0)
+    for game_config in win_first_move_games:
+        for state in random_states(game_config.game_class):
+            status = state.get_status()
+            assert status.is_terminal == state.is_terminal()
+            if status.is_terminal:
+                assert status.result == state.get_result()
+                assert status.legal_action_ids == []
+            else:
+                assert status.result is None
+                assert sorted(status.legal_action_ids) == sorted(state.get_legal_action_ids())
+            assert state.get_status() is status
+
+def test_apply_and_undo_in_place():
+    random.seed(0)
+    for game_config in win_first_move_games:
+        if not game_config.game_class.supports_in_place:
+            continue
+        for state in random_states(game_config.game_class, num_games=5):
+            copy = state.copy()
+            path = []
+            while not copy.compute_status().is_terminal:
+                action_id = random.choice(copy.compute_status().legal_action_ids)
+                expected = str(state.take_action_id(action_id)) if not path else None
+                copy.apply_action_id(action_id)
+                if expected is not None:
+                    assert str(copy) == expected
+                    assert hash(copy) == hash(state.take_action_id(action_id))
+                path.append(action_id)
+            for _ in path:
+                copy.undo_action()
+            assert str(copy) == str(state)
+            assert hash(copy) == hash(state)
+            assert copy.compute_status() == state.compute_status()
+
+def test_equal_positions_are_equal_states():
+    random.seed(0)
+    for game_config in win_first_move_games:
+        states_by_str = {}
+        for state in random_states(game_config.game_class):
+            assert not hasattr(state, '__dict__')
+            other = states_by_str.setdefault(str(state), state)
+            assert other == state
+            assert hash(other) == hash(state)
+        assert len(set(states_by_str.values())) == len(states_by_str)
+
+def test_canonical_form_maps_actions():
+    random.seed(0)
+    for game_config in win_first_move_games:
+        for state in random_states(game_config.game_class, num_games=5):
+            canonical, action_map = state.canonical_form()
+            assert canonical.canonical_form()[0] == canonical
+            assert sorted(action_map) == sorted(state.get_status().legal_action_ids)
+            assert sorted(action_map.values()) == sorted(canonical.get_status().legal_action_ids)
+            if state.is_terminal():
+                player, canonical_player = state.get_player_to_move(), canonical.get_player_to_move()
+                assert state.get_result()[player] == canonical.get_result()[canonical_player]
+            for action_id, canonical_id in action_map.items():
+                child = state.take_action_id(action_id).canonical_form()[0]
+                assert child == canonical.take_action_id(canonical_id).canonical_form()[0]
+
+def test_codec_round_trip():
+    random.seed(0)
+    for game_config in win_first_move_games:
+        for state in random_states(game_config.game_class, num_games=5):
+            decoded = decode(encode(state))
+            assert type(decoded) is type(state)
+            assert decoded == state
+            assert str(decoded) == str(state)
+            assert decoded.get_status() == state.get_status()
+
+def test_codec_round_trip_large_heaps():
+    for state in [GrundysGame([1000, 300, 1]), BookNim([70000, 0, 5], 1), WythofsNim([1 << 40, 3])]:
+        decoded = decode(encode(state))
+        assert decoded == state
@@ -1,95 +1,45 @@
-from games.tic_tac_toe_uneven import TicTacToe3x4, TicTacToe4x3
-from games.domineering import Domineering
-from games.kayles import Kayles
-from games.book_nim import BookNimEasy
-from games.count_twenty_one import CountToTwentyOne
-from games.coin_counter import CoinCounterGridState
-from games.wythofs_nim import WythofsNim
-from games.grundys_game import GrundysGame
-from games.subtract_square import SubtractSquare
-from games.turning_turtles import TurningTurtles
-from games.connect_n import ConnectThree4x5, ConnectThree5x4
+import importlib
+from dataclasses import dataclass
+from typing import Dict, Type
+
+from mcts.abstract_game import AbstractGameState
+
+@dataclass(frozen=True)
+class GameEntry:
+    """
+    A game in the benchmark. The game's module is only imported when
+    game_class is first used, so listing or filtering games is cheap.
+    """
+    name: str
+    class_path: str  # 'module:ClassName'
+    mcts_iterations: int
+    category: str
+    # False if mcts/exact_solver.py can't solve the game in reasonable time
+    exact_solvable: bool = True
+
+    @property
+    def game_class(self) -> Type[AbstractGameState]:
+        module_name, class_name = self.class_path.split(':')
+        return getattr(importlib.import_module(module_name), class_name)
 
 win_first_move_games = [
-    { 
-        "game_class": TicTacToe3x4, 
-        "mcts_iterations": 8000,
-        "name": "Tic Tac Toe (3x4, 3-in-a-row)",
-        "category": "grid"
-    },
-    { 
-        "game_class": TicTacToe4x3, 
-        "mcts_iterations": 8000,
-        "name": "Tic Tac Toe (4x3, 3-in-a-row)",
-        "category": "grid"
-    },
-    {
-        "game_class": CountToTwentyOne,
-        "mcts_iterations": 80000,
-        "name": "Count to Twenty-One",
-        "category": "nim"
-    },
-    { 
-        "game_class": Kayles, 
-        "mcts_iterations": 10000,
-        "name": "Kayles",
-        "category": "nim"
-    },
-    { 
-        "game_class": BookNimEasy, 
-        "mcts_iterations": 5000, 
-        "name": "Book Nim",
-        "category": "nim"
-    },
-    {
-        "game_class": WythofsNim,
-        "mcts_iterations": 16000,
-        "name": "Wythof's Nim",
-        "category": "nim"
-    },
-    { 
-        "game_class": Domineering, 
-        "mcts_iterations": 1000,
-        "name": "Domineering",
-        "category": "grid"
-    },
-    {
-        "game_class": CoinCounterGridState,
-        "mcts_iterations": 8000,
-        "name": "Coin Counter",
-        "category": "grid"
-    },
-    {
-        "game_class": GrundysGame,
-        "mcts_iterations": 800,
-        "name": "Grundy's Game",
-        "category": "nim"
-    },
-    {
-        "game_class": SubtractSquare,
-        "mcts_iterations": 500,
-        "name": "Subtract a Square",
-        "category": "nim"
-    },
-    {
-        "game_class": TurningTurtles,
-        "mcts_iterations": 4000,
-        "name": "Turning Turtles",
-        "category": "nim"
-    },
-    {
-        "game_class": ConnectThree4x5,
-        "mcts_iterations": 3000,
-        "name": "Connect 3 (4x5)",
-        "category": "grid"
-    },
-    {
-        "game_class": ConnectThree5x4,
-        "mcts_iterations": 3000,
-        "name": "Connect 3 (5x4)",
-        "category": "grid"
-    },   
+    GameEntry("Tic Tac Toe (3x4, 3-in-a-row)", "games.tic_tac_toe_uneven:TicTacToe3x4", 8000, "grid"),
+    GameEntry("Tic Tac Toe (4x3, 3-in-a-row)", "games.tic_tac_toe_uneven:TicTacToe4x3", 8000, "grid"),
+    GameEntry("Count to Twenty-One", "games.count_twenty_one:CountToTwentyOne", 80000, "nim"),
+    GameEntry("Kayles", "games.kayles:Kayles", 10000, "nim"),
+    GameEntry("Book Nim", "games.book_nim:BookNimEasy", 5000, "nim"),
+    GameEntry("Wythof's Nim", "games.wythofs_nim:WythofsNim", 16000, "nim"),
+    GameEntry("Domineering", "games.domineering:Domineering", 1000, "grid"),
+    GameEntry("Domineering (6x6)", "games.domineering:Domineering6x6", 4000, "grid", exact_solvable=False),
+    GameEntry("Coin Counter", "games.coin_counter:CoinCounterGridState", 8000, "grid"),
+    GameEntry("Grundy's Game", "games.grundys_game:GrundysGame", 800, "nim"),
+    GameEntry("Subtract a Square", "games.subtract_square:SubtractSquare", 500, "nim"),
+    GameEntry("Turning Turtles", "games.turning_turtles:TurningTurtles", 4000, "nim"),
+    GameEntry("Connect 3 (4x5)", "games.connect_n:ConnectThree4x5", 3000, "grid"),
+    GameEntry("Connect 3 (5x4)", "games.connect_n:ConnectThree5x4", 3000, "grid"),
 ]
 
+games_by_name: Dict[str, GameEntry] = {game.name: game for game in win_first_move_games}
+
 # Make subset with just Book Nim, Coin Counter, and Connect 3 (4x5)
-subset_games = [x for x in win_first_move_games if x['name'] in ["Book Nim", "Coin Counter", "Connect 3 (4x5)"]]
\ No newline at end of file
+subset_games = [games_by_name[name] for name in ["Book Nim", "Coin Counter", "Connect 3 (4x5)"]]
@@ -0,0 +1,447 @@
+"""
+NumPy batch environments, which hold many games of one kind as arrays and
+step them all at once from a vector of action ids. They are meant for
+generating data and measuring random or heuristic baselines, where
+stepping one Python state at a time is the bottleneck.
+
+NumPy is only needed by this module, so the rest of the repo runs without it.
+"""
+import abc
+from typing import List, Optional, Tuple, Type
+
+import numpy as np
+
+from mcts.abstract_game import AbstractGameState
+from games.bitboard import line_masks
+from games.book_nim import BookNim
+from games.coin_counter import CoinCounterGridState
+from games.connect_n import ConnectN
+from games.count_twenty_one import CountToTwentyOne
+from games.domineering import Domineering
+from games.grundys_game import GrundysGame
+from games.kayles import Kayles
+from games.subtract_square import SubtractSquare
+from games.tic_tac_toe_uneven import TicTacToeUnevenState
+from games.turning_turtles import TurningTurtles
+from games.wythofs_nim import WythofsNim
+
+_ONE = np.uint64(1)
+
+def _bit_mask(bits: np.ndarray, num_bits: int) -> np.ndarray:
+    """Returns a (len(bits), num_bits) bool array of the low bits of each uint64"""
+    return (bits[:, None] >> np.arange(num_bits, dtype=np.uint64)) & _ONE == _ONE
+
+def _has_line(bits: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    """Returns whether each bitboard covers any of the masks"""
+    return ((bits[:, None] & masks) == masks).any(axis=1)
+
+class BatchEnv(abc.ABC):
+    """
+    num_games copies of a game, all starting from initial_state.
+
+    Actions are the game's action ids (see get_legal_action_ids), so
+    legal_mask has one column per id in range(num_actions). Per game, the
+    environment keeps:
+    - player_to_move: 0 or 1
+    - terminal: whether the game is over
+    - result: the result of a finished game, as in get_result, else (0, 0)
+    """
+    num_actions: int
+
+    def __init__(self, initial_state: AbstractGameState, num_games: int):
+        self.initial_state = initial_state
+        self.num_games = num_games
+        self.player_to_move = np.zeros(num_games, dtype=np.int8)
+        self.terminal = np.zeros(num_games, dtype=bool)
+        self.result = np.zeros((num_games, 2), dtype=np.float32)
+        self.reset()
+
+    def reset(self, games: Optional[np.ndarray] = None) -> None:
+        """Puts every game, or the games picked by a bool mask, back at the initial state"""
+        index = np.arange(self.num_games) if games is None else np.flatnonzero(games)
+        self.player_to_move[index] = self.initial_state.get_player_to_move()
+        self.terminal[index] = False
+        self.result[index] = 0.0
+        self._reset(index)
+        self._update_terminal(index)
+
+    def legal_mask(self) -> np.ndarray:
+        """Returns a (num_games, num_actions) bool array of legal actions; finished games have none"""
+        mask = self._legal_mask()
+        mask[self.terminal] = False
+        return mask
+
+    def step(self, action_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Plays action_ids[i] in game i for every game that is not over, and
+        returns (terminal, result). Actions must be legal; those given for
+        finished games are ignored.
+        """
+        index = np.flatnonzero(~self.terminal)
+        self._apply(index, np.asarray(action_ids, dtype=np.int64)[index])
+        self.player_to_move[index] ^= 1
+        self._update_terminal(index)
+        return self.terminal, self.result
+
+    def random_actions(self, rng: np.random.Generator) -> np.ndarray:
+        """Returns a uniformly random legal action for each game (0 for finished games)"""
+        return np.argmax(rng.random((self.num_games, self.num_actions)) * self.legal_mask(), axis=1)
+
+    def _update_terminal(self, index: np.ndarray) -> None:
+        ended, winner = self._game_over(index)
+        ended_index = index[ended]
+        winner = winner[ended]
+        self.terminal[ended_index] = True
+        # winner is 0 or 1, or -1 for a draw
+        self.result[ended_index, 0] = (winner == 0).astype(np.float32) - (winner == 1)
+        self.result[ended_index, 1] = -self.result[ended_index, 0]
+
+    def _last_mover_wins(self, index: np.ndarray, ended: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        return ended, 1 - self.player_to_move[index]
+
+    @abc.abstractmethod
+    def _reset(self, index: np.ndarray) -> None:
+        """Puts the games in index back at the initial state"""
+        pass
+
+    @abc.abstractmethod
+    def _legal_mask(self) -> np.ndarray:
+        """Returns a (num_games, num_actions) bool array of legal actions"""
+        pass
+
+    @abc.abstractmethod
+    def _apply(self, index: np.ndarray, action_ids: np.ndarray) -> None:
+        """Plays the actions for the games in index; player_to_move is flipped afterwards"""
+        pass
+
+    @abc.abstractmethod
+    def _game_over(self, index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns (ended, winner) for the games in index, with -1 as the winner of a draw"""
+        pass
+
+class TicTacToeBatchEnv(BatchEnv):
+    def __init__(self, initial_state: TicTacToeUnevenState, num_games: int):
+        self.num_actions = initial_state.num_rows * initial_state.num_cols
+        if self.num_actions > 64:
+            raise ValueError("Batched tic-tac-toe boards are limited to 64 cells")
+        self.full = np.uint64((1 << self.num_actions) - 1)
+        all_masks, _ = line_masks(initial_state.num_rows, initial_state.num_cols, initial_state.num_in_a_row)
+        self.masks = np.array(all_masks, dtype=np.uint64)
+        self.x_bits = np.zeros(num_games, dtype=np.uint64)
+        self.o_bits = np.zeros(num_games, dtype=np.uint64)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        self.x_bits[index] = self.initial_state.x_bits
+        self.o_bits[index] = self.initial_state.o_bits
+
+    def _legal_mask(self):
+        return _bit_mask(~(self.x_bits | self.o_bits) & self.full, self.num_actions)
+
+    def _apply(self, index, action_ids):
+        bits = _ONE << action_ids.astype(np.uint64)
+        x_moves = self.player_to_move[index] == 0
+        self.x_bits[index[x_moves]] |= bits[x_moves]
+        self.o_bits[index[~x_moves]] |= bits[~x_moves]
+
+    def _game_over(self, index):
+        won = _has_line(self.x_bits[index], self.masks) | _has_line(self.o_bits[index], self.masks)
+        full = (self.x_bits[index] | self.o_bits[index]) == self.full
+        return won | full, np.where(won, 1 - self.player_to_move[index], -1)
+
+class ConnectBatchEnv(BatchEnv):
+    def __init__(self, initial_state: ConnectN, num_games: int):
+        self.rows, self.cols = initial_state.rows, initial_state.cols
+        if self.rows * self.cols > 64:
+            raise ValueError("Batched Connect boards are limited to 64 cells")
+        self.num_actions = self.cols
+        all_masks, _ = line_masks(self.rows, self.cols, initial_state.n_to_win)
+        self.masks = np.array(all_masks, dtype=np.uint64)
+        self.bits = np.zeros((2, num_games), dtype=np.uint64)
+        self.heights = np.zeros((num_games, self.cols), dtype=np.int64)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        self.bits[0, index] = self.initial_state.bits[0]
+        self.bits[1, index] = self.initial_state.bits[1]
+        self.heights[index] = self.initial_state.heights
+
+    def _legal_mask(self):
+        return self.heights < self.rows
+
+    def _apply(self, index, action_ids):
+        # Pieces stack from the bottom row up
+        cells = (self.rows - 1 - self.heights[index, action_ids]) * self.cols + action_ids
+        movers = self.player_to_move[index]
+        self.bits[movers, index] |= _ONE << cells.astype(np.uint64)
+        self.heights[index, action_ids] += 1
+
+    def _game_over(self, index):
+        won = _has_line(self.bits[0, index], self.masks) | _has_line(self.bits[1, index], self.masks)
+        full = (self.heights[index] == self.rows).all(axis=1)
+        return won | full, np.where(won, 1 - self.player_to_move[index], -1)
+
+class DomineeringBatchEnv(BatchEnv):
+    def __init__(self, initial_state: Domineering, num_games: int):
+        self.size = initial_state.size
+        if self.size > 8:
+            raise ValueError("Batched Domineering boards are limited to 8x8")
+        self.num_actions = self.size * self.size
+        not_last_col = 0
+        for row in range(self.size):
+            not_last_col |= ((1 << (self.size - 1)) - 1) << (row * self.size)
+        self.not_last_col = np.uint64(not_last_col)
+        self.empty = np.zeros(num_games, dtype=np.uint64)
+        super().__init__(initial_state, num_games)
+
+    def _placements(self, empty: np.ndarray, player_to_move: np.ndarray) -> np.ndarray:
+        # Top-left cells of the dominos each player could place
+        # Shifting up a row brings in no cells below the last row
+        vertical = empty & (empty >> np.uint64(self.size))
+        horizontal = empty & (empty >> _ONE) & self.not_last_col
+        return np.where(player_to_move == 0, vertical, horizontal)
+
+    def _reset(self, index):
+        self.empty[index] = self.initial_state.empty
+
+    def _legal_mask(self):
+        return _bit_mask(self._placements(self.empty, self.player_to_move), self.num_actions)
+
+    def _apply(self, index, action_ids):
+        vertical = np.uint64(1 | 1 << self.size)
+        covered = np.where(self.player_to_move[index] == 0, vertical, np.uint64(0b11)) << action_ids.astype(np.uint64)
+        self.empty[index] &= ~covered
+
+    def _game_over(self, index):
+        # The player to move loses when they cannot place a domino
+        ended = self._placements(self.empty[index], self.player_to_move[index]) == 0
+        return self._last_mover_wins(index, ended)
+
+class CoinCounterBatchEnv(BatchEnv):
+    num_actions = 9
+    lines = np.array([(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)])
+
+    def __init__(self, initial_state: CoinCounterGridState, num_games: int):
+        self.cells = np.zeros((num_games, 9), dtype=np.int8)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        self.cells[index] = [count for row in self.initial_state.grid for count in row]
+
+    def _legal_mask(self):
+        return self.cells < 2
+
+    def _apply(self, index, action_ids):
+        self.cells[index, action_ids] += 1
+
+    def _game_over(self, index):
+        lines = self.cells[index][:, self.lines]
+        won = ((lines[:, :, 0] > 0) & (lines[:, :, 0] == lines[:, :, 1]) & (lines[:, :, 1] == lines[:, :, 2])).any(axis=1)
+        full = (self.cells[index] == 2).all(axis=1)
+        return won | full, np.where(won, 1 - self.player_to_move[index], -1)
+
+class KaylesBatchEnv(BatchEnv):
+    def __init__(self, initial_state: Kayles, num_games: int):
+        self.num_pins = initial_state.num_pins
+        if self.num_pins > 64:
+            raise ValueError("Batched Kayles is limited to 64 pins")
+        # Ids i for knocking down pin i, num_pins + i for pins i and i + 1
+        self.num_actions = 2 * self.num_pins
+        self.standing = np.zeros(num_games, dtype=np.uint64)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        self.standing[index] = self.initial_state.standing
+
+    def _legal_mask(self):
+        singles = _bit_mask(self.standing, self.num_pins)
+        pairs = _bit_mask(self.standing & (self.standing >> _ONE), self.num_pins)
+        return np.concatenate([singles, pairs], axis=1)
+
+    def _apply(self, index, action_ids):
+        single = action_ids < self.num_pins
+        shift = np.where(single, action_ids, action_ids - self.num_pins).astype(np.uint64)
+        self.standing[index] &= ~(np.where(single, _ONE, np.uint64(0b11)) << shift)
+
+    def _game_over(self, index):
+        return self._last_mover_wins(index, self.standing[index] == 0)
+
+class TurningTurtlesBatchEnv(BatchEnv):
+    def __init__(self, initial_state: TurningTurtles, num_games: int):
+        self.num_coins = initial_state.num_coins
+        if self.num_coins > 64:
+            raise ValueError("Batched Turning Turtles is limited to 64 coins")
+        # Ids left * num_coins + right
+        self.num_actions = self.num_coins * self.num_coins
+        coins = np.arange(self.num_coins)
+        self.left_of_right = coins[:, None] <= coins[None, :]
+        self.heads = np.zeros(num_games, dtype=np.uint64)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        self.heads[index] = self.initial_state.heads
+
+    def _legal_mask(self):
+        # The right coin must be heads; the left coin can be any coin to its left, or itself
+        right_heads = _bit_mask(self.heads, self.num_coins)
+        return (right_heads[:, None, :] & self.left_of_right).reshape(self.num_games, self.num_actions)
+
+    def _apply(self, index, action_ids):
+        left, right = np.divmod(action_ids, self.num_coins)
+        self.heads[index] ^= (_ONE << left.astype(np.uint64)) | (_ONE << right.astype(np.uint64))
+
+    def _game_over(self, index):
+        return self._last_mover_wins(index, self.heads[index] == 0)
+
+class BookNimBatchEnv(BatchEnv):
+    def __init__(self, initial_state: BookNim, num_games: int):
+        self.num_shelves = len(initial_state.shelves)
+        # Ids books * num_shelves + shelf
+        self.num_actions = (max(initial_state.shelves) + 1) * self.num_shelves
+        self.books = np.arange(max(initial_state.shelves) + 1)
+        self.shelves = np.zeros((num_games, self.num_shelves), dtype=np.int64)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        self.shelves[index] = self.initial_state.shelves
+
+    def _legal_mask(self):
+        books = self.books[None, :, None]
+        mask = (books >= 1) & (books <= self.shelves[:, None, :])
+        return mask.reshape(self.num_games, self.num_actions)
+
+    def _apply(self, index, action_ids):
+        books, shelf = np.divmod(action_ids, self.num_shelves)
+        self.shelves[index, shelf] -= books
+
+    def _game_over(self, index):
+        # Misère: whoever took the last book loses, so the player to move wins
+        ended = (self.shelves[index] == 0).all(axis=1)
+        return ended, self.player_to_move[index].astype(np.int64)
+
+class WythofsNimBatchEnv(BatchEnv):
+    def __init__(self, initial_state: WythofsNim, num_games: int):
+        # Ids tokens * 3 + kind, where kind is the pile, or 2 for both piles
+        self.tokens = np.arange(max(initial_state.piles) + 1)
+        self.num_actions = 3 * len(self.tokens)
+        self.piles = np.zeros((num_games, 2), dtype=np.int64)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        self.piles[index] = self.initial_state.piles
+
+    def _legal_mask(self):
+        limits = np.concatenate([self.piles, self.piles.min(axis=1, keepdims=True)], axis=1)
+        tokens = self.tokens[None, :, None]
+        mask = (tokens >= 1) & (tokens <= limits[:, None, :])
+        return mask.reshape(self.num_games, self.num_actions)
+
+    def _apply(self, index, action_ids):
+        tokens, kind = np.divmod(action_ids, 3)
+        self.piles[index, 0] -= tokens * (kind != 1)
+        self.piles[index, 1] -= tokens * (kind != 0)
+
+    def _game_over(self, index):
+        return self._last_mover_wins(index, (self.piles[index] == 0).all(axis=1))
+
+class CountToTwentyOneBatchEnv(BatchEnv):
+    # Ids are the number counted to
+    num_actions = 22
+
+    def __init__(self, initial_state: CountToTwentyOne, num_games: int):
+        self.number = np.zeros(num_games, dtype=np.int64)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        self.number[index] = self.initial_state.current_number
+
+    def _legal_mask(self):
+        targets = np.arange(self.num_actions)[None, :]
+        current = self.number[:, None]
+        return (targets > current) & (targets <= np.minimum(current + 3, 21))
+
+    def _apply(self, index, action_ids):
+        self.number[index] = action_ids
+
+    def _game_over(self, index):
+        return self._last_mover_wins(index, self.number[index] == 21)
+
+class SubtractSquareBatchEnv(BatchEnv):
+    def __init__(self, initial_state: SubtractSquare, num_games: int):
+        # Ids are the square subtracted
+        self.num_actions = initial_state.number + 1
+        ids = np.arange(self.num_actions)
+        self.squares = (ids >= 1) & (np.round(np.sqrt(ids)) ** 2 == ids)
+        self.number = np.zeros(num_games, dtype=np.int64)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        self.number[index] = self.initial_state.number
+
+    def _legal_mask(self):
+        return self.squares & (np.arange(self.num_actions)[None, :] <= self.number[:, None])
+
+    def _apply(self, index, action_ids):
+        self.number[index] -= action_ids
+
+    def _game_over(self, index):
+        return self._last_mover_wins(index, self.number[index] < 1)
+
+class GrundysGameBatchEnv(BatchEnv):
+    """Heaps are held as a count of heaps of each size"""
+    def __init__(self, initial_state: GrundysGame, num_games: int):
+        largest = max(initial_state.heaps, default=0)
+        # Ids heap_size * (heap_size + 1) // 2 + smaller part
+        self.num_actions = (largest + 1) * (largest + 2) // 2
+        self.action_heap = np.zeros(self.num_actions, dtype=np.int64)
+        self.action_part = np.zeros(self.num_actions, dtype=np.int64)
+        valid = np.zeros(self.num_actions, dtype=bool)
+        for heap_size in range(3, largest + 1):
+            for smaller in range(1, (heap_size + 1) // 2):
+                action_id = heap_size * (heap_size + 1) // 2 + smaller
+                self.action_heap[action_id] = heap_size
+                self.action_part[action_id] = smaller
+                valid[action_id] = True
+        self.valid = valid
+        self.counts = np.zeros((num_games, largest + 1), dtype=np.int64)
+        super().__init__(initial_state, num_games)
+
+    def _reset(self, index):
+        counts = np.bincount(np.array(self.initial_state.heaps, dtype=np.int64), minlength=self.counts.shape[1])
+        self.counts[index] = counts
+
+    def _legal_mask(self):
+        return self.valid & (self.counts[:, self.action_heap] > 0)
+
+    def _apply(self, index, action_ids):
+        heap_size = self.action_heap[action_ids]
+        smaller = self.action_part[action_ids]
+        # The three sizes differ, so each row changes three distinct entries
+        self.counts[index, heap_size] -= 1
+        self.counts[index, heap_size - smaller] += 1
+        self.counts[index, smaller] += 1
+
+    def _game_over(self, index):
+        return self._last_mover_wins(index, (self.counts[index, 3:] == 0).all(axis=1))
+
+# Checked in order, so subclasses come before their bases
+_batch_envs: List[Tuple[Type[AbstractGameState], Type[BatchEnv]]] = [
+    (TicTacToeUnevenState, TicTacToeBatchEnv),
+    (ConnectN, ConnectBatchEnv),
+    (Domineering, DomineeringBatchEnv),
+    (CoinCounterGridState, CoinCounterBatchEnv),
+    (Kayles, KaylesBatchEnv),
+    (TurningTurtles, TurningTurtlesBatchEnv),
+    (BookNim, BookNimBatchEnv),
+    (WythofsNim, WythofsNimBatchEnv),
+    (CountToTwentyOne, CountToTwentyOneBatchEnv),
+    (SubtractSquare, SubtractSquareBatchEnv),
+    (GrundysGame, GrundysGameBatchEnv),
+]
+
+def make_batch_env(initial_state: AbstractGameState, num_games: int) -> BatchEnv:
+    """Returns a batch environment of num_games games starting from initial_state"""
+    for game_class, env_class in _batch_envs:
+        if isinstance(initial_state, game_class):
+            return env_class(initial_state, num_games)
+    raise ValueError(f"No batch environment for {type(initial_state).__name__}")
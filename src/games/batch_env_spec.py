@@ -0,0 +1,38 @@
+import random
+
+import pytest
+
+from games.all_list import win_first_move_games
+from games.connect_n import ConnectN
+from games.tic_tac_toe_uneven import TicTacToeUnevenState
+
+np = pytest.importorskip("numpy")
+from games.batch_env import make_batch_env
+
+def test_batch_env_matches_game_states():
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    for game_config in win_first_move_games:
+        env = make_batch_env(game_config.game_class(), 16)
+        states = [game_config.game_class() for _ in range(env.num_games)]
+        while not env.terminal.all():
+            mask = env.legal_mask()
+            for i, state in enumerate(states):
+                status = state.get_status()
+                assert env.terminal[i] == status.is_terminal
+                assert env.player_to_move[i] == state.get_player_to_move()
+                assert sorted(np.flatnonzero(mask[i])) == sorted(status.legal_action_ids)
+            action_ids = env.random_actions(rng)
+            env.step(action_ids)
+            states = [
+                state if state.is_terminal() else state.take_action_id(int(action_id))
+                for state, action_id in zip(states, action_ids)
+            ]
+        for i, state in enumerate(states):
+            assert state.is_terminal()
+            assert tuple(env.result[i]) == state.get_result()
+
+def test_batch_env_rejects_boards_over_64_cells():
+    for state in [TicTacToeUnevenState(num_rows=9, num_cols=8, num_in_a_row=4), ConnectN(9, 8, 4)]:
+        with pytest.raises(ValueError):
+            make_batch_env(state, 4)
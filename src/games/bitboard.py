@@ -0,0 +1,104 @@
+import random
+from functools import lru_cache
+from typing import List, Tuple
+
+# Helpers for games that store a grid as integer bitboards.
+# Cell (row, col) of a grid with num_cols columns is bit row * num_cols + col.
+
+@lru_cache(maxsize=None)
+def line_masks(num_rows: int, num_cols: int, num_in_a_row: int) -> Tuple[Tuple[int, ...], Tuple[Tuple[int, ...], ...]]:
+    """
+    Returns (all_masks, cell_masks) for a num_rows x num_cols grid, where
+    all_masks holds a bitmask for every horizontal, vertical and diagonal
+    line of num_in_a_row cells, and cell_masks[i] holds the masks of the
+    lines that pass through cell i.
+    """
+    masks = []
+    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
+    for row in range(num_rows):
+        for col in range(num_cols):
+            for d_row, d_col in directions:
+                end_row = row + d_row * (num_in_a_row - 1)
+                end_col = col + d_col * (num_in_a_row - 1)
+                if not (0 <= end_row < num_rows and 0 <= end_col < num_cols):
+                    continue
+                mask = 0
+                for i in range(num_in_a_row):
+                    mask |= 1 << ((row + d_row * i) * num_cols + col + d_col * i)
+                masks.append(mask)
+
+    cell_masks = tuple(
+        tuple(mask for mask in masks if mask >> cell & 1)
+        for cell in range(num_rows * num_cols)
+    )
+    return tuple(masks), cell_masks
+
+@lru_cache(maxsize=None)
+def cell_names(num_rows: int, num_cols: int) -> Tuple[str, ...]:
+    """Returns the 'row,col' action string for every cell index"""
+    return tuple(f"{row},{col}" for row in range(num_rows) for col in range(num_cols))
+
+def has_line(bits: int, masks: Tuple[int, ...]) -> bool:
+    """Returns True if bits covers any of the masks"""
+    for mask in masks:
+        if bits & mask == mask:
+            return True
+    return False
+
+def set_bits(bits: int) -> List[int]:
+    """Returns the indices of the set bits of bits, in increasing order"""
+    indices = []
+    while bits:
+        low = bits & -bits
+        indices.append(low.bit_length() - 1)
+        bits ^= low
+    return indices
+
+@lru_cache(maxsize=None)
+def grid_symmetries(num_rows: int, num_cols: int) -> Tuple[Tuple[int, ...], ...]:
+    """
+    Returns the reflections and rotations that map a num_rows x num_cols
+    grid onto itself, as cell permutations where perm[cell] is the cell
+    that cell moves to. There are 4 for a rectangular grid and 8 for a
+    square one; the identity comes first and the left-right mirror second.
+    """
+    last_row, last_col = num_rows - 1, num_cols - 1
+    maps = [
+        lambda row, col: (row, col),
+        lambda row, col: (row, last_col - col),
+        lambda row, col: (last_row - row, col),
+        lambda row, col: (last_row - row, last_col - col),
+    ]
+    if num_rows == num_cols:
+        # Transposes, which swap rows and columns
+        maps += [
+            lambda row, col: (col, row),
+            lambda row, col: (col, last_row - row),
+            lambda row, col: (last_col - col, row),
+            lambda row, col: (last_col - col, last_row - row),
+        ]
+    symmetries = []
+    for cell_map in maps:
+        perm = []
+        for row in range(num_rows):
+            for col in range(num_cols):
+                new_row, new_col = cell_map(row, col)
+                perm.append(new_row * num_cols + new_col)
+        symmetries.append(tuple(perm))
+    return tuple(symmetries)
+
+def permute_bits(bits: int, perm: Tuple[int, ...]) -> int:
+    """Moves each set bit i of bits to bit perm[i]"""
+    result = 0
+    for cell in set_bits(bits):
+        result |= 1 << perm[cell]
+    return result
+
+@lru_cache(maxsize=None)
+def zobrist_keys(num_keys: int) -> Tuple[int, ...]:
+    """
+    Returns num_keys random 64-bit ints for Zobrist hashing. They are drawn
+    from a fixed seed, so keys agree across processes and runs.
+    """
+    rng = random.Random(0)
+    return tuple(rng.getrandbits(64) for _ in range(num_keys))
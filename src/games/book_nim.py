@@ -1,16 +1,13 @@
 from typing import List, Tuple
-import copy
-from dataclasses import dataclass
 
-from mcts.abstract_game import AbstractGameState
+from mcts.abstract_game import AbstractGameState, GameStatus
+from games.state_codec import pack_values, unpack_values
 
-@dataclass
 class BookNim(AbstractGameState):
-    shelves: List[int]
-    player_to_move: int
+    __slots__ = ('shelves', 'player_to_move')
 
     def __init__(self, shelves: List[int] = None, player_to_move: int = 0):
-        self.shelves = shelves if shelves is not None else [3, 4, 5]
+        self.shelves = tuple(shelves) if shelves is not None else (3, 4, 5)
         self.player_to_move = player_to_move
 
     def get_name(self) -> str:
@@ -46,21 +43,52 @@ For example, to remove 2 books from shelf 1, specify the move '1,2'.
                 actions.append(f"{shelf},{books}")
         return actions
 
-    def take_action(self, action: str) -> 'BookNim':
-        """Takes action in format 'shelf,books_to_remove' and returns new state"""
+    def get_legal_action_ids(self) -> List[int]:
+        """Returns legal moves as ids books_to_remove * num_shelves + shelf"""
+        num_shelves = len(self.shelves)
+        return [
+            books * num_shelves + shelf
+            for shelf in range(num_shelves)
+            for books in range(1, self.shelves[shelf] + 1)
+        ]
+
+    def action_to_id(self, action: str) -> int:
         shelf, books = map(int, action.split(','))
         if not (0 <= shelf < len(self.shelves)):
             raise ValueError("Invalid shelf")
-        if not (1 <= books <= self.shelves[shelf]):
+        if books < 1:
             raise ValueError("Invalid number of books")
+        return books * len(self.shelves) + shelf
 
-        new_shelves = copy.deepcopy(self.shelves)
-        new_shelves[shelf] -= books
-        return BookNim(new_shelves, 1 - self.player_to_move)
+    def id_to_action(self, action_id: int) -> str:
+        books, shelf = divmod(action_id, len(self.shelves))
+        return f"{shelf},{books}"
+
+    def take_action(self, action: str) -> 'BookNim':
+        """Takes action in format 'shelf,books_to_remove' and returns new state"""
+        action_id = self.action_to_id(action)
+        books, shelf = divmod(action_id, len(self.shelves))
+        if books > self.shelves[shelf]:
+            raise ValueError("Invalid number of books")
+        return self.take_action_id(action_id)
+
+    def take_action_id(self, action_id: int) -> 'BookNim':
+        books, shelf = divmod(action_id, len(self.shelves))
+        new_shelves = self.shelves[:shelf] + (self.shelves[shelf] - books,) + self.shelves[shelf + 1:]
+        new_state = object.__new__(type(self))
+        new_state.shelves = new_shelves
+        new_state.player_to_move = 1 - self.player_to_move
+        return new_state
+
+    def compute_status(self) -> GameStatus:
+        if not any(self.shelves):
+            # The player who just moved (not player_to_move) took the last book and lost
+            return GameStatus([], True, (-1.0, 1.0) if self.player_to_move == 1 else (1.0, -1.0))
+        return GameStatus(self.get_legal_action_ids(), False, None)
 
     def is_terminal(self) -> bool:
         """Returns True if game is over (no books remain)"""
-        return sum(self.shelves) == 0
+        return not any(self.shelves)
 
     def get_result(self) -> Tuple[float, float]:
         """Returns (-1, 1) if player 0 loses, (1, -1) if player 1 loses"""
@@ -75,6 +103,16 @@ For example, to remove 2 books from shelf 1, specify the move '1,2'.
         else:
             return (1.0, -1.0)
 
+    def _key(self) -> tuple:
+        return (self.shelves, self.player_to_move)
+
+    def to_int(self) -> int:
+        return pack_values(self.shelves) << 1 | self.player_to_move
+
+    @classmethod
+    def from_int(cls, value: int) -> 'BookNim':
+        return cls(unpack_values(value >> 1), value & 1)
+
     def get_player_to_move(self) -> int:
         return self.player_to_move
 
@@ -87,6 +125,8 @@ For example, to remove 2 books from shelf 1, specify the move '1,2'.
         return result
 
 class BookNimEasy(BookNim):
+    __slots__ = ()
+
     def __init__(self, shelves: List[int] = None, player_to_move: int = 0):
         # Initialize with 1, 3, 4 books by default
         super().__init__(shelves if shelves is not None else [1, 3, 4], player_to_move)
@@ -95,6 +135,8 @@ class BookNimEasy(BookNim):
         return "Book Nim (Easy)"
 
 class BookNimHard(BookNim):
+    __slots__ = ()
+
     def __init__(self, shelves: List[int] = None, player_to_move: int = 0):
         # Initialize with 2, 4, 5 books by default
         super().__init__(shelves if shelves is not None else [2, 4, 5], player_to_move)
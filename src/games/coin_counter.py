@@ -1,15 +1,31 @@
-from typing import List, Tuple
-import copy
-from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+from mcts.abstract_game import GameStatus, InPlaceGameState
+from games.bitboard import grid_symmetries, zobrist_keys
+
+# Key 3 * cell + count for each cell's coin count, and a last key for player 1 to move
+_ZOBRIST = zobrist_keys(3 * 9 + 1)
+
+# For each line of three cells: (mask of their count bits, pattern if all
+# three hold 1 coin, pattern if all three hold 2 coins)
+_LINES = tuple(
+    (ones * 3, ones, ones * 2)
+    for ones in (
+        sum(1 << (2 * cell) for cell in cells)
+        for cells in [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+    )
+)
+
+class CoinCounterGridState(InPlaceGameState):
+    """
+    The grid is packed into a single int with two bits per cell, holding
+    the number of coins (0, 1 or 2) on cell row * 3 + col.
+
+    The state's hash is a Zobrist key (a random key per (cell, count), plus
+    one for player 1 to move) that each move updates in O(1).
+    """
+    __slots__ = ('cells', '_player_to_move', '_zobrist', '_history')
 
-from mcts.abstract_game import AbstractGameState
-
-@dataclass
-class Position:
-    row: int
-    col: int
-
-class CoinCounterGridState(AbstractGameState):
     def __init__(self, grid: List[List[int]] = None, player_to_move: int = 0):
         """
         Initialize the game state.
@@ -19,8 +35,24 @@ class CoinCounterGridState(AbstractGameState):
         if grid is None:
             grid = [[0 for _ in range(3)] for _ in range(3)]
             grid[0][0] = 1
-        self.grid = grid
+        self.cells = sum(grid[row][col] << (2 * (row * 3 + col)) for row in range(3) for col in range(3))
         self._player_to_move = player_to_move
+        self._zobrist = self._compute_zobrist()
+
+    def _compute_zobrist(self) -> int:
+        zobrist = _ZOBRIST[-1] if self._player_to_move == 1 else 0
+        for cell in range(9):
+            zobrist ^= _ZOBRIST[3 * cell + (self.cells >> (2 * cell) & 3)]
+        return zobrist
+
+    def _move_zobrist(self, cell: int) -> int:
+        """XOR of the keys that change when a coin is added to cell"""
+        count = self.cells >> (2 * cell) & 3
+        return _ZOBRIST[3 * cell + count] ^ _ZOBRIST[3 * cell + count + 1] ^ _ZOBRIST[-1]
+
+    @property
+    def grid(self) -> List[List[int]]:
+        return [[self.cells >> (2 * (row * 3 + col)) & 3 for col in range(3)] for row in range(3)]
 
     def get_short_game_description(self) -> str:
         return """\
@@ -50,45 +82,116 @@ Two players take turns placing coins on a 3x3 grid, which starts with one coin a
 
     def get_legal_actions(self) -> List[str]:
         """Returns list of legal moves in format 'row,col'"""
-        actions = []
-        for row in range(3):
-            for col in range(3):
-                if self.grid[row][col] < 2:  # Can add a coin if less than 2 coin
-                    actions.append(f"{row},{col}")
-        return actions
+        return [self.id_to_action(cell) for cell in self.get_legal_action_ids()]
 
-    def take_action(self, action: str) -> 'CoinCounterGridState':
-        """Takes action in format 'row,col' and returns new state"""
+    def get_legal_action_ids(self) -> List[int]:
+        """Returns the cells of legal moves, numbered row * 3 + col"""
+        # A cell is full when its high bit is set (2 coins)
+        return [cell for cell in range(9) if not self.cells >> (2 * cell + 1) & 1]
+
+    def action_to_id(self, action: str) -> int:
         row, col = map(int, action.split(','))
         if not (0 <= row < 3 and 0 <= col < 3):
             raise ValueError("Invalid position")
-        if self.grid[row][col] > 1:
-            raise ValueError("Cannot place more than 2 coins in a position")
+        return row * 3 + col
+
+    def id_to_action(self, action_id: int) -> str:
+        return f"{action_id // 3},{action_id % 3}"
 
-        # Create new state with updated grid
-        new_grid = copy.deepcopy(self.grid)
-        new_grid[row][col] += 1
-        return CoinCounterGridState(new_grid, 1 - self._player_to_move)
+    def take_action(self, action: str) -> 'CoinCounterGridState':
+        """Takes action in format 'row,col' and returns new state"""
+        cell = self.action_to_id(action)
+        if self.cells >> (2 * cell + 1) & 1:
+            raise ValueError("Cannot place more than 2 coins in a position")
+        return self.take_action_id(cell)
+
+    def take_action_id(self, cell: int) -> 'CoinCounterGridState':
+        new_state = object.__new__(type(self))
+        new_state.cells = self.cells + (1 << (2 * cell))
+        new_state._player_to_move = 1 - self._player_to_move
+        new_state._zobrist = self._zobrist ^ self._move_zobrist(cell)
+        return new_state
+
+    def copy(self, undoable: bool = True) -> 'CoinCounterGridState':
+        new_state = object.__new__(type(self))
+        new_state.cells = self.cells
+        new_state._player_to_move = self._player_to_move
+        new_state._zobrist = self._zobrist
+        # Cells that coins were added to since the copy
+        new_state._history = [] if undoable else None
+        return new_state
+
+    def apply_action_id(self, cell: int) -> None:
+        if self._history is not None:
+            self._history.append(cell)
+        self._zobrist ^= self._move_zobrist(cell)
+        self.cells += 1 << (2 * cell)
+        self._player_to_move = 1 - self._player_to_move
+
+    def undo_action(self) -> None:
+        cell = self._history.pop()
+        self.cells -= 1 << (2 * cell)
+        self._zobrist ^= self._move_zobrist(cell)
+        self._player_to_move = 1 - self._player_to_move
 
     def _check_win(self) -> bool:
         """Check if current state is a win for either player"""
-        # Check rows
-        for row in range(3):
-            if self.grid[row][0] > 0 and self.grid[row][0] == self.grid[row][1] == self.grid[row][2]:
+        cells = self.cells
+        for mask, ones, twos in _LINES:
+            line = cells & mask
+            if line == ones or line == twos:
                 return True
+        return False
 
-        # Check columns
-        for col in range(3):
-            if self.grid[0][col] > 0 and self.grid[0][col] == self.grid[1][col] == self.grid[2][col]:
-                return True
+    def _key(self) -> tuple:
+        return (self.cells, self._player_to_move)
 
-        # Check diagonals
-        if self.grid[0][0] > 0 and self.grid[0][0] == self.grid[1][1] == self.grid[2][2]:
-            return True
-        if self.grid[0][2] > 0 and self.grid[0][2] == self.grid[1][1] == self.grid[2][0]:
-            return True
+    def to_int(self) -> int:
+        return self.cells << 1 | self._player_to_move
 
-        return False
+    @classmethod
+    def from_int(cls, value: int) -> 'CoinCounterGridState':
+        state = object.__new__(cls)
+        state.cells = value >> 1
+        state._player_to_move = value & 1
+        state._zobrist = state._compute_zobrist()
+        return state
+
+    def canonical_form(self) -> Tuple['CoinCounterGridState', Dict[int, int]]:
+        """
+        The canonical state is the reflection or rotation of the grid with
+        the smallest packed cells.
+        """
+        best_cells, best_perm = self.cells, None
+        for perm in grid_symmetries(3, 3)[1:]:
+            cells = 0
+            for cell in range(9):
+                cells |= (self.cells >> (2 * cell) & 3) << (2 * perm[cell])
+            if cells < best_cells:
+                best_cells, best_perm = cells, perm
+        action_ids = self.get_status().legal_action_ids
+        if best_perm is None:
+            return self, {cell: cell for cell in action_ids}
+
+        canonical = object.__new__(type(self))
+        canonical.cells = best_cells
+        canonical._player_to_move = self._player_to_move
+        canonical._zobrist = canonical._compute_zobrist()
+        return canonical, {cell: best_perm[cell] for cell in action_ids}
+
+    def __hash__(self) -> int:
+        return self._zobrist
+
+    def compute_status(self) -> GameStatus:
+        # Check for a win once, rather than in both is_terminal and get_result
+        if self._check_win():
+            # The player who just moved (not player_to_move) made the line
+            result = (1.0, -1.0) if self._player_to_move == 1 else (-1.0, 1.0)
+            return GameStatus([], True, result)
+        action_ids = self.get_legal_action_ids()
+        if not action_ids:
+            return GameStatus([], True, self.get_result())
+        return GameStatus(action_ids, False, None)
 
     def is_terminal(self) -> bool:
         """Returns True if game is over"""
@@ -96,7 +199,7 @@ Two players take turns placing coins on a 3x3 grid, which starts with one coin a
             return True
         
         # Check if grid is full (no more legal moves)
-        return len(self.get_legal_actions()) == 0
+        return len(self.get_legal_action_ids()) == 0
 
     def get_result(self) -> Tuple[float, float]:
         """Returns (1, -1) if player 0 wins, (-1, 1) if player 1 wins"""
@@ -120,9 +223,10 @@ Two players take turns placing coins on a 3x3 grid, which starts with one coin a
         """Returns string representation of the game state"""
         result = f"Player {self._player_to_move}'s turn\n"
         result += "  0   1   2\n"  # Column numbers
+        grid = self.grid
         for row in range(3):
             result += f"{row} "  # Row numbers
-            result += " | ".join(str(cell) for cell in self.grid[row])
+            result += " | ".join(str(cell) for cell in grid[row])
             if row < 2:
                 result += "\n  ---------\n"
         return result
\ No newline at end of file
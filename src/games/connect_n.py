@@ -1,15 +1,72 @@
-from typing import List, Tuple, Optional
-from mcts.abstract_game import AbstractGameState
+from typing import Dict, List, Tuple, Optional
+from mcts.abstract_game import GameStatus, InPlaceGameState
+from games.bitboard import grid_symmetries, has_line, line_masks, permute_bits, set_bits, zobrist_keys
+
+class ConnectN(InPlaceGameState):
+    """
+    The board is stored as one bitboard per player, with cell (row, col) at
+    bit row * cols + col (row 0 is the top), plus the number of pieces in
+    each column. A win can only be made by the piece just dropped, so the
+    winner is found once per move by checking the lines through that piece.
+
+    The state's hash is a Zobrist key (a random key per (cell, player)
+    piece, plus one for player 1 to move) that each move updates in O(1).
+    """
+    __slots__ = ('rows', 'cols', 'n_to_win', 'player_to_move', 'bits', 'heights', '_winner', '_zobrist', '_history')
+
+    symbols = ['X', 'O']
 
-class ConnectN(AbstractGameState):
     def __init__(self, rows: int, cols: int, n_to_win: int, board: List[List[str]] = None, player_to_move: int = 0):
         self.rows = rows
         self.cols = cols
         self.n_to_win = n_to_win
-        # Initialize empty board if none provided
-        self.board = [row.copy() for row in board] if board is not None else [[' ' for _ in range(cols)] for _ in range(rows)]
         self.player_to_move = player_to_move
-        self.symbols = ['X', 'O']
+        bits = [0, 0]
+        if board is not None:
+            for row in range(rows):
+                for col in range(cols):
+                    if board[row][col] != ' ':
+                        bits[self.symbols.index(board[row][col])] |= 1 << (row * cols + col)
+        self.bits = tuple(bits)
+        self._derive_fields()
+
+    def _derive_fields(self) -> None:
+        """Sets the fields that follow from the bitboards and player to move"""
+        occupied = self.bits[0] | self.bits[1]
+        self.heights = tuple(
+            sum(occupied >> (row * self.cols + col) & 1 for row in range(self.rows))
+            for col in range(self.cols)
+        )
+        all_masks, _ = line_masks(self.rows, self.cols, self.n_to_win)
+        self._winner = None
+        for player in (0, 1):
+            if has_line(self.bits[player], all_masks):
+                self._winner = player
+        self._zobrist = self._compute_zobrist()
+
+    def _zobrist_keys(self) -> Tuple[int, ...]:
+        # Key 2 * cell + player for each piece, and a last key for player 1 to move
+        return zobrist_keys(2 * self.rows * self.cols + 1)
+
+    def _compute_zobrist(self) -> int:
+        keys = self._zobrist_keys()
+        zobrist = keys[-1] if self.player_to_move == 1 else 0
+        for player in (0, 1):
+            for cell in set_bits(self.bits[player]):
+                zobrist ^= keys[2 * cell + player]
+        return zobrist
+
+    @property
+    def board(self) -> List[List[str]]:
+        return [
+            [
+                self.symbols[0] if self.bits[0] >> (row * self.cols + col) & 1
+                else self.symbols[1] if self.bits[1] >> (row * self.cols + col) & 1
+                else ' '
+                for col in range(self.cols)
+            ]
+            for row in range(self.rows)
+        ]
 
     def get_name(self) -> str:
         return f"Connect{self.n_to_win}, on a {self.rows}x{self.cols} board"
@@ -42,70 +99,164 @@ You will be playing with {self.symbols[self.player_to_move]}.
 
     def get_legal_actions(self) -> List[str]:
         """Returns list of legal columns (those not full)"""
-        return [str(col) for col in range(self.cols) if self.board[0][col] == ' ']
+        return [str(col) for col in range(self.cols) if self.heights[col] < self.rows]
 
-    def take_action(self, action: str) -> 'ConnectN':
-        """Takes action and returns new state"""
+    def get_legal_action_ids(self) -> List[int]:
+        """Returns the legal columns as ints"""
+        return [col for col in range(self.cols) if self.heights[col] < self.rows]
+
+    def action_to_id(self, action: str) -> int:
         try:
             col = int(action)
         except ValueError:
             raise ValueError("Invalid action: must be a string representing an integer")
         if not (0 <= col < self.cols):
             raise ValueError("Invalid column")
-        if self.board[0][col] != ' ':
-            raise ValueError("Column is full")
+        return col
+
+    def id_to_action(self, action_id: int) -> str:
+        return str(action_id)
 
-        # Create a deep copy of the board
-        new_board = [row[:] for row in self.board]
-        row = self.rows - 1
-        while row >= 0 and new_board[row][col] != ' ':
-            row -= 1
-        # Add safety check
-        if row < 0:
+    def take_action(self, action: str) -> 'ConnectN':
+        """Takes action and returns new state"""
+        col = self.action_to_id(action)
+        if self.heights[col] >= self.rows:
             raise ValueError("Column is full")
-        new_board[row][col] = self.symbols[self.player_to_move]
+        return self.take_action_id(col)
+
+    def take_action_id(self, col: int) -> 'ConnectN':
+        # Pieces stack from the bottom row up
+        row = self.rows - 1 - self.heights[col]
+        cell = row * self.cols + col
+        mover = self.player_to_move
+
+        new_state = object.__new__(type(self))
+        new_state.rows = self.rows
+        new_state.cols = self.cols
+        new_state.n_to_win = self.n_to_win
+        new_state.player_to_move = 1 - mover
+        bits = list(self.bits)
+        bits[mover] |= 1 << cell
+        new_state.bits = tuple(bits)
+        heights = list(self.heights)
+        heights[col] += 1
+        new_state.heights = tuple(heights)
+        new_state._winner = self._winner
+        if new_state._winner is None:
+            _, cell_masks = line_masks(self.rows, self.cols, self.n_to_win)
+            if has_line(new_state.bits[mover], cell_masks[cell]):
+                new_state._winner = mover
+        keys = self._zobrist_keys()
+        new_state._zobrist = self._zobrist ^ keys[2 * cell + mover] ^ keys[-1]
+        return new_state
 
-        return ConnectN(self.rows, self.cols, self.n_to_win, new_board, 1 - self.player_to_move)
+    def copy(self, undoable: bool = True) -> 'ConnectN':
+        new_state = object.__new__(type(self))
+        new_state.rows = self.rows
+        new_state.cols = self.cols
+        new_state.n_to_win = self.n_to_win
+        new_state.player_to_move = self.player_to_move
+        # Lists, so that they can be updated in place
+        new_state.bits = list(self.bits)
+        new_state.heights = list(self.heights)
+        new_state._winner = self._winner
+        new_state._zobrist = self._zobrist
+        # Each entry is col * 3 + the previous winner (0 for none, 1 or 2 for players 0 or 1)
+        new_state._history = [] if undoable else None
+        return new_state
+
+    def apply_action_id(self, col: int) -> None:
+        if self._history is not None:
+            self._history.append(col * 3 + (0 if self._winner is None else self._winner + 1))
+        mover = self.player_to_move
+        cell = (self.rows - 1 - self.heights[col]) * self.cols + col
+        self.bits[mover] |= 1 << cell
+        self.heights[col] += 1
+        if self._winner is None:
+            _, cell_masks = line_masks(self.rows, self.cols, self.n_to_win)
+            if has_line(self.bits[mover], cell_masks[cell]):
+                self._winner = mover
+        keys = self._zobrist_keys()
+        self._zobrist ^= keys[2 * cell + mover] ^ keys[-1]
+        self.player_to_move = 1 - mover
+
+    def undo_action(self) -> None:
+        col, previous_winner = divmod(self._history.pop(), 3)
+        self.player_to_move = 1 - self.player_to_move
+        self.heights[col] -= 1
+        cell = (self.rows - 1 - self.heights[col]) * self.cols + col
+        self.bits[self.player_to_move] &= ~(1 << cell)
+        self._winner = None if previous_winner == 0 else previous_winner - 1
+        keys = self._zobrist_keys()
+        self._zobrist ^= keys[2 * cell + self.player_to_move] ^ keys[-1]
+
+    def _key(self) -> tuple:
+        return (self.rows, self.cols, self.n_to_win, self.bits[0], self.bits[1], self.player_to_move)
+
+    def to_int(self) -> int:
+        # Rows, columns and line length take a byte each, then the player and both bitboards
+        num_cells = self.rows * self.cols
+        bits = (self.bits[1] << num_cells | self.bits[0]) << 1 | self.player_to_move
+        return bits << 24 | self.n_to_win << 16 | self.cols << 8 | self.rows
+
+    @classmethod
+    def from_int(cls, value: int) -> 'ConnectN':
+        state = object.__new__(cls)
+        state.rows = value & 0xff
+        state.cols = value >> 8 & 0xff
+        state.n_to_win = value >> 16 & 0xff
+        value >>= 24
+        num_cells = state.rows * state.cols
+        state.player_to_move = value & 1
+        state.bits = (value >> 1 & ((1 << num_cells) - 1), value >> (1 + num_cells))
+        state._derive_fields()
+        return state
+
+    def canonical_form(self) -> Tuple['ConnectN', Dict[int, int]]:
+        """
+        Gravity rules out all symmetries but the left-right mirror, so the
+        canonical state is whichever of the board and its mirror has the
+        smaller bitboards.
+        """
+        mirror = grid_symmetries(self.rows, self.cols)[1]
+        bits = (permute_bits(self.bits[0], mirror), permute_bits(self.bits[1], mirror))
+        action_ids = self.get_status().legal_action_ids
+        if bits >= (self.bits[0], self.bits[1]):
+            return self, {col: col for col in action_ids}
+
+        canonical = object.__new__(type(self))
+        canonical.rows = self.rows
+        canonical.cols = self.cols
+        canonical.n_to_win = self.n_to_win
+        canonical.player_to_move = self.player_to_move
+        canonical.bits = bits
+        canonical.heights = tuple(reversed(self.heights))
+        canonical._winner = self._winner
+        canonical._zobrist = canonical._compute_zobrist()
+        return canonical, {col: self.cols - 1 - col for col in action_ids}
+
+    def __hash__(self) -> int:
+        return self._zobrist
 
     def _check_winner(self) -> Optional[int]:
         """Returns winning player (0 or 1) or None if no winner"""
-        # Check horizontal
-        for row in range(self.rows):
-            for col in range(self.cols - self.n_to_win + 1):
-                if self.board[row][col] != ' ':
-                    if all(self.board[row][col+i] == self.board[row][col] for i in range(self.n_to_win)):
-                        return 0 if self.board[row][col] == self.symbols[0] else 1
-
-        # Check vertical
-        for row in range(self.rows - self.n_to_win + 1):
-            for col in range(self.cols):
-                if self.board[row][col] != ' ':
-                    if all(self.board[row+i][col] == self.board[row][col] for i in range(self.n_to_win)):
-                        return 0 if self.board[row][col] == self.symbols[0] else 1
-
-        # Check diagonal (top-left to bottom-right)
-        for row in range(self.rows - self.n_to_win + 1):
-            for col in range(self.cols - self.n_to_win + 1):
-                if self.board[row][col] != ' ':
-                    if all(self.board[row+i][col+i] == self.board[row][col] for i in range(self.n_to_win)):
-                        return 0 if self.board[row][col] == self.symbols[0] else 1
-
-        # Check diagonal (top-right to bottom-left)
-        for row in range(self.rows - self.n_to_win + 1):
-            for col in range(self.n_to_win - 1, self.cols):
-                if self.board[row][col] != ' ':
-                    if all(self.board[row+i][col-i] == self.board[row][col] for i in range(self.n_to_win)):
-                        return 0 if self.board[row][col] == self.symbols[0] else 1
-
-        return None
+        return self._winner
+
+    def compute_status(self) -> GameStatus:
+        if self._winner is not None:
+            return GameStatus([], True, (1.0, -1.0) if self._winner == 0 else (-1.0, 1.0))
+        action_ids = [col for col in range(self.cols) if self.heights[col] < self.rows]
+        if not action_ids:
+            return GameStatus([], True, (0.0, 0.0))
+        return GameStatus(action_ids, False, None)
 
     def is_terminal(self) -> bool:
         """Returns True if game is over (winner or draw)"""
-        return self._check_winner() is not None or len(self.get_legal_actions()) == 0
+        return self._winner is not None or all(height == self.rows for height in self.heights)
 
     def get_result(self) -> Tuple[float, float]:
         """Returns (1, -1) if player 0 wins, (-1, 1) if player 1 wins, (0, 0) for draw"""
-        winner = self._check_winner()
+        winner = self._winner
         if winner is None:
             return (0.0, 0.0)  # Draw
         elif winner == 0:
@@ -127,10 +278,21 @@ You will be playing with {self.symbols[self.player_to_move]}.
 
 
 class ConnectThree4x5(ConnectN):
+    __slots__ = ()
+
     def __init__(self, board: List[List[str]] = None, player_to_move: int = 0, rows: int = 4, cols: int = 5, n_to_win: int = 3):
         super().__init__(rows=rows, cols=cols, n_to_win=n_to_win, board=board, player_to_move=player_to_move)
 
 
 class ConnectThree5x4(ConnectN):
+    __slots__ = ()
+
     def __init__(self, board: List[List[str]] = None, player_to_move: int = 0, rows: int = 5, cols: int = 4, n_to_win: int = 3):
         super().__init__(rows=rows, cols=cols, n_to_win=n_to_win, board=board, player_to_move=player_to_move)
+
+
+class ConnectFour6x7(ConnectN):
+    __slots__ = ()
+
+    def __init__(self, board: List[List[str]] = None, player_to_move: int = 0, rows: int = 6, cols: int = 7, n_to_win: int = 4):
+        super().__init__(rows=rows, cols=cols, n_to_win=n_to_win, board=board, player_to_move=player_to_move)
@@ -1,7 +1,9 @@
 from typing import List, Tuple
-from mcts.abstract_game import AbstractGameState
+from mcts.abstract_game import AbstractGameState, GameStatus
 
 class CountToTwentyOne(AbstractGameState):
+    __slots__ = ('current_number', 'player_to_move')
+
     def __init__(self, current_number: int = 0, player_to_move: int = 0):
         self.current_number = current_number
         self.player_to_move = player_to_move
@@ -43,21 +45,40 @@ To make a move, specify which number you want to count to: '6', '7', or '8' and
                 actions.append(str(count))
         return actions
 
+    def get_legal_action_ids(self) -> List[int]:
+        """Returns the numbers that can be counted to, as ints"""
+        return list(range(self.current_number + 1, min(self.current_number + 3, 21) + 1))
+
+    def action_to_id(self, action: str) -> int:
+        return int(action)
+
+    def id_to_action(self, action_id: int) -> str:
+        return str(action_id)
+
     def take_action(self, action: str) -> 'CountToTwentyOne':
         """Takes action and returns new state.
         Action should be the target number to count to."""
-        count = int(action)
+        count = self.action_to_id(action)
         if count <= self.current_number:
             raise ValueError("Must count higher than current number")
         if count > 21:
             raise ValueError("Cannot count beyond 21")
         if count - self.current_number > 3:
             raise ValueError("Cannot count more than 3 numbers")
+        return self.take_action_id(count)
+
+    def take_action_id(self, count: int) -> 'CountToTwentyOne':
         return CountToTwentyOne(
             count,
             1 - self.player_to_move
         )
 
+    def compute_status(self) -> GameStatus:
+        if self.current_number == 21:
+            # The player who just moved (not player_to_move) said 21
+            return GameStatus([], True, (1.0, -1.0) if self.player_to_move == 1 else (-1.0, 1.0))
+        return GameStatus(self.get_legal_action_ids(), False, None)
+
     def is_terminal(self) -> bool:
         """Returns True if game is reached 21"""
         return self.current_number == 21
@@ -74,6 +95,16 @@ To make a move, specify which number you want to count to: '6', '7', or '8' and
         else:
             return (-1.0, 1.0)
 
+    def _key(self) -> tuple:
+        return (self.current_number, self.player_to_move)
+
+    def to_int(self) -> int:
+        return self.current_number << 1 | self.player_to_move
+
+    @classmethod
+    def from_int(cls, value: int) -> 'CountToTwentyOne':
+        return cls(value >> 1, value & 1)
+
     def get_player_to_move(self) -> int:
         return self.player_to_move
 
@@ -1,7 +1,33 @@
-from typing import List, Tuple
-from mcts.abstract_game import AbstractGameState
+from functools import lru_cache
+from typing import Dict, List, Tuple
+from mcts.abstract_game import GameStatus, InPlaceGameState
+from games.bitboard import cell_names, grid_symmetries, permute_bits, set_bits, zobrist_keys
+
+@lru_cache(maxsize=None)
+def _masks(size: int) -> Tuple[int, int, int]:
+    """Returns (full board, cells not in the last row, cells not in the last column)"""
+    full = (1 << (size * size)) - 1
+    not_last_row = (1 << (size * (size - 1))) - 1
+    not_last_col = 0
+    for row in range(size):
+        not_last_col |= ((1 << (size - 1)) - 1) << (row * size)
+    return full, not_last_row, not_last_col
+
+@lru_cache(maxsize=None)
+def _column_major(size: int) -> Tuple[int, ...]:
+    return tuple(row * size + col for col in range(size) for row in range(size))
+
+class Domineering(InPlaceGameState):
+    """
+    The board is stored as a bitboard of empty cells, with cell (row, col)
+    at bit row * size + col. The top-left cells of all legal vertical or
+    horizontal placements are found at once by shifting the bitboard.
+
+    The state's hash is a Zobrist key (a random key per empty cell, plus
+    one for player 1 to move) that each move updates in O(1).
+    """
+    __slots__ = ('size', 'empty', 'player_to_move', '_zobrist', '_history')
 
-class Domineering(AbstractGameState):
     def __init__(self, size: int = 4, board: List[List[bool]] = None, player_to_move: int = 0):
         # Validate board size
         if size < 2:
@@ -9,12 +35,50 @@ class Domineering(AbstractGameState):
         self.size = size
         
         # Initialize NxN board (True = empty space, False = occupied)
-        self.board = board if board is not None else [[True] * size for _ in range(size)]
-        if len(self.board) != size or any(len(row) != size for row in self.board):
-            raise ValueError(f"Board must be {size}x{size}")
+        if board is None:
+            self.empty = _masks(size)[0]
+        else:
+            if len(board) != size or any(len(row) != size for row in board):
+                raise ValueError(f"Board must be {size}x{size}")
+            self.empty = 0
+            for row in range(size):
+                for col in range(size):
+                    if board[row][col]:
+                        self.empty |= 1 << (row * size + col)
         self.player_to_move = player_to_move
         # Player 0 places vertical dominos, Player 1 places horizontal dominos
-        
+        self._zobrist = self._compute_zobrist()
+
+    def _zobrist_keys(self) -> Tuple[int, ...]:
+        # Key cell for each empty cell, and a last key for player 1 to move
+        return zobrist_keys(self.size * self.size + 1)
+
+    def _compute_zobrist(self) -> int:
+        keys = self._zobrist_keys()
+        zobrist = keys[-1] if self.player_to_move == 1 else 0
+        for cell in set_bits(self.empty):
+            zobrist ^= keys[cell]
+        return zobrist
+
+    @property
+    def board(self) -> List[List[bool]]:
+        return [
+            [bool(self.empty >> (row * self.size + col) & 1) for col in range(self.size)]
+            for row in range(self.size)
+        ]
+
+    def _placements(self, player: int) -> int:
+        """Bitboard of the top-left cells of player's legal dominos"""
+        _, not_last_row, not_last_col = _masks(self.size)
+        if player == 0:  # Vertical: the cell below must be empty too
+            return self.empty & (self.empty >> self.size) & not_last_row
+        return self.empty & (self.empty >> 1) & not_last_col
+
+    def num_legal_actions(self, player: int = None) -> int:
+        """Number of legal moves for player (default: the player to move)"""
+        player = self.player_to_move if player is None else player
+        return bin(self._placements(player)).count("1")
+
     def get_name(self) -> str:
         return f"Domineering ({self.size}x{self.size})"
 
@@ -46,43 +110,138 @@ To make a move, specify the top-left coordinate of where you want to place your
 """
 
     def get_legal_actions(self) -> List[str]:
-        actions = []
-        
-        if self.player_to_move == 0:  # Vertical dominos
-            for col in range(self.size):
-                for row in range(self.size - 1):  # Only up to second-to-last row
-                    if self.board[row][col] and self.board[row + 1][col]:
-                        actions.append(f"{row},{col}")
-        else:  # Horizontal dominos
-            for row in range(self.size):
-                for col in range(self.size - 1):  # Only up to second-to-last column
-                    if self.board[row][col] and self.board[row][col + 1]:
-                        actions.append(f"{row},{col}")
-        
-        return actions
+        placements = self._placements(self.player_to_move)
+        names = cell_names(self.size, self.size)
+        if self.player_to_move == 0:  # Vertical dominos, listed column by column
+            return [names[cell] for cell in _column_major(self.size) if placements >> cell & 1]
+        else:  # Horizontal dominos, listed row by row
+            return [names[cell] for cell in range(self.size * self.size) if placements >> cell & 1]
 
-    def take_action(self, action: str) -> 'Domineering':
+    def get_legal_action_ids(self) -> List[int]:
+        """Returns the top-left cells of legal dominos, numbered row * size + col"""
+        return set_bits(self._placements(self.player_to_move))
+
+    def action_to_id(self, action: str) -> int:
         row, col = map(int, action.split(','))
-        new_board = [row.copy() for row in self.board]
-        
+        if not (0 <= row < self.size and 0 <= col < self.size):
+            raise ValueError("Invalid " + ("vertical" if self.player_to_move == 0 else "horizontal") + " domino placement")
+        return row * self.size + col
+
+    def id_to_action(self, action_id: int) -> str:
+        return cell_names(self.size, self.size)[action_id]
+
+    def take_action(self, action: str) -> 'Domineering':
+        cell = self.action_to_id(action)
+        if not self._placements(self.player_to_move) >> cell & 1:
+            raise ValueError("Invalid " + ("vertical" if self.player_to_move == 0 else "horizontal") + " domino placement")
+        return self.take_action_id(cell)
+
+    def take_action_id(self, cell: int) -> 'Domineering':
         if self.player_to_move == 0:  # Place vertical domino
-            if not (0 <= row < self.size - 1 and 0 <= col < self.size and 
-                   self.board[row][col] and self.board[row + 1][col]):
-                raise ValueError("Invalid vertical domino placement")
-            new_board[row][col] = False
-            new_board[row + 1][col] = False
+            covered = (1 | 1 << self.size) << cell
+            other = cell + self.size
         else:  # Place horizontal domino
-            if not (0 <= row < self.size and 0 <= col < self.size - 1 and 
-                   self.board[row][col] and self.board[row][col + 1]):
-                raise ValueError("Invalid horizontal domino placement")
-            new_board[row][col] = False
-            new_board[row][col + 1] = False
-            
-        return Domineering(self.size, new_board, 1 - self.player_to_move)
+            covered = 0b11 << cell
+            other = cell + 1
+
+        new_state = object.__new__(type(self))
+        new_state.size = self.size
+        new_state.empty = self.empty & ~covered
+        new_state.player_to_move = 1 - self.player_to_move
+        keys = self._zobrist_keys()
+        new_state._zobrist = self._zobrist ^ keys[cell] ^ keys[other] ^ keys[-1]
+        return new_state
+
+    def copy(self, undoable: bool = True) -> 'Domineering':
+        new_state = object.__new__(type(self))
+        new_state.size = self.size
+        new_state.empty = self.empty
+        new_state.player_to_move = self.player_to_move
+        new_state._zobrist = self._zobrist
+        # Top-left cells of the dominos placed since the copy
+        new_state._history = [] if undoable else None
+        return new_state
+
+    def _covered(self, cell: int, player: int) -> int:
+        if player == 0:  # Vertical domino
+            return (1 | 1 << self.size) << cell
+        return 0b11 << cell  # Horizontal domino
+
+    def _toggle_zobrist(self, cell: int, player: int) -> None:
+        keys = self._zobrist_keys()
+        other = cell + self.size if player == 0 else cell + 1
+        self._zobrist ^= keys[cell] ^ keys[other] ^ keys[-1]
+
+    def apply_action_id(self, cell: int) -> None:
+        if self._history is not None:
+            self._history.append(cell)
+        self.empty &= ~self._covered(cell, self.player_to_move)
+        self._toggle_zobrist(cell, self.player_to_move)
+        self.player_to_move = 1 - self.player_to_move
+
+    def undo_action(self) -> None:
+        cell = self._history.pop()
+        self.player_to_move = 1 - self.player_to_move
+        self.empty |= self._covered(cell, self.player_to_move)
+        self._toggle_zobrist(cell, self.player_to_move)
+
+    def _key(self) -> tuple:
+        return (self.size, self.empty, self.player_to_move)
+
+    def to_int(self) -> int:
+        # The size takes a byte, then the player and the empty cells
+        return (self.empty << 1 | self.player_to_move) << 8 | self.size
+
+    @classmethod
+    def from_int(cls, value: int) -> 'Domineering':
+        state = object.__new__(cls)
+        state.size = value & 0xff
+        state.player_to_move = value >> 8 & 1
+        state.empty = value >> 9
+        state._zobrist = state._compute_zobrist()
+        return state
+
+    def canonical_form(self) -> Tuple['Domineering', Dict[int, int]]:
+        """
+        Reflections keep every domino's orientation. Transposes turn
+        vertical dominos into horizontal ones, so they also swap the
+        player to move, which is only sound for values relative to the
+        player to move. The canonical state is the image with the smallest
+        (player_to_move, empty).
+        """
+        size = self.size
+        best_key, best_perm = (self.player_to_move, self.empty), None
+        for perm in grid_symmetries(size, size)[1:]:
+            # Cells 0 and size are a vertical domino; see if it stays vertical
+            keeps_roles = abs(perm[size] - perm[0]) == size
+            key = (self.player_to_move if keeps_roles else 1 - self.player_to_move, permute_bits(self.empty, perm))
+            if key < best_key:
+                best_key, best_perm = key, perm
+        action_ids = self.get_status().legal_action_ids
+        if best_perm is None:
+            return self, {cell: cell for cell in action_ids}
+
+        canonical = object.__new__(type(self))
+        canonical.size = size
+        canonical.player_to_move, canonical.empty = best_key
+        canonical._zobrist = canonical._compute_zobrist()
+        # A domino's top-left cell is the smaller of its two cells' images
+        other = size if self.player_to_move == 0 else 1
+        return canonical, {cell: min(best_perm[cell], best_perm[cell + other]) for cell in action_ids}
+
+    def __hash__(self) -> int:
+        return self._zobrist
+
+    def compute_status(self) -> GameStatus:
+        # One shift pass gives both the legal moves and whether there are any
+        placements = self._placements(self.player_to_move)
+        if placements == 0:
+            return GameStatus([], True, self.get_result())
+        return GameStatus(set_bits(placements), False, None)
 
     def is_terminal(self) -> bool:
         # Game is over if current player has no legal moves
-        return len(self.get_legal_actions()) == 0
+        return self._placements(self.player_to_move) == 0
 
     def get_result(self) -> Tuple[float, float]:
         if not self.is_terminal():
@@ -114,3 +273,17 @@ To make a move, specify the top-left coordinate of where you want to place your
             result += "\n"
             
         return result
+
+
+class Domineering6x6(Domineering):
+    __slots__ = ()
+
+    def __init__(self, size: int = 6, board: List[List[bool]] = None, player_to_move: int = 0):
+        super().__init__(size=size, board=board, player_to_move=player_to_move)
+
+
+class Domineering8x8(Domineering):
+    __slots__ = ()
+
+    def __init__(self, size: int = 8, board: List[List[bool]] = None, player_to_move: int = 0):
+        super().__init__(size=size, board=board, player_to_move=player_to_move)
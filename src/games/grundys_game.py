@@ -1,10 +1,33 @@
 from typing import List, Tuple
-from mcts.abstract_game import AbstractGameState
+from mcts.abstract_game import AbstractGameState, GameStatus
+from games.state_codec import pack_values, unpack_values
+
+def _isqrt(n: int) -> int:
+    """Returns the integer square root of n (math.isqrt needs Python 3.8)"""
+    if n == 0:
+        return 0
+    # Newton's method, starting from a power of two at or above the root
+    root = 1 << (n.bit_length() + 1) // 2
+    while True:
+        next_root = (root + n // root) // 2
+        if next_root >= root:
+            return root
+        root = next_root
 
 class GrundysGame(AbstractGameState):
+    """
+    Heaps are stored as a tuple sorted in descending order, and only one
+    split is generated per distinct heap size and pair of parts, so that
+    moves leading to the same heaps are not searched twice.
+
+    The action id of splitting a heap of size n into n - k and k (k < n - k)
+    is n * (n + 1) // 2 + k.
+    """
+    __slots__ = ('heaps', 'player_to_move')
+
     def __init__(self, heaps: List[int] = None, player_to_move: int = 0):
         # Initialize with default heap of 11 if no heaps provided
-        self.heaps = heaps if heaps is not None else [11]
+        self.heaps = tuple(sorted(heaps, reverse=True)) if heaps is not None else (11,)
         self.player_to_move = player_to_move
 
     def get_name(self) -> str:
@@ -43,38 +66,72 @@ Note that heaps will sorted after each move in descending order, so the largest
 """
 
     def get_legal_actions(self) -> List[str]:
-        """Returns list of legal splits for all available heaps"""
-        actions = []
-        for heap_idx, heap_size in enumerate(self.heaps):
-            if heap_size >= 3:
-                # Generate all possible unequal splits
-                for i in range(1, heap_size):
-                    if i != heap_size - i:  # Ensure unequal parts
-                        actions.append(f"{heap_idx}:{i},{heap_size-i}")
-        return actions
-
-    def take_action(self, action: str) -> 'GrundysGame':
-        """Takes action in format 'heap_idx:size1,size2' and returns new state"""
+        """Returns one split, larger part first, per distinct heap size and pair of parts"""
+        return [self.id_to_action(action_id) for action_id in self.get_legal_action_ids()]
+
+    def get_legal_action_ids(self) -> List[int]:
+        action_ids = []
+        previous = None
+        for heap_size in self.heaps:
+            if heap_size < 3:
+                break
+            if heap_size == previous:
+                continue
+            previous = heap_size
+            base = heap_size * (heap_size + 1) // 2
+            action_ids.extend(base + smaller for smaller in range(1, (heap_size + 1) // 2))
+        return action_ids
+
+    def action_to_id(self, action: str) -> int:
         heap_idx_str, split_str = action.split(':')
         heap_idx = int(heap_idx_str)
         size1, size2 = map(int, split_str.split(','))
-        
-        if heap_idx >= len(self.heaps):
+
+        if not 0 <= heap_idx < len(self.heaps):
             raise ValueError("Invalid heap index")
-        if size1 + size2 != self.heaps[heap_idx]:
+        heap_size = self.heaps[heap_idx]
+        if size1 + size2 != heap_size:
             raise ValueError("Split sizes must sum to original heap size")
         if size1 == size2:
             raise ValueError("Split must be unequal")
         if size1 <= 0 or size2 <= 0:
             raise ValueError("Split sizes must be positive")
+        return heap_size * (heap_size + 1) // 2 + min(size1, size2)
 
-        # Create new heap list with the split
-        new_heaps = self.heaps.copy()
-        new_heaps.pop(heap_idx)
-        new_heaps.extend([size1, size2])
-        new_heaps.sort(reverse=True)  # Optional: keep heaps sorted for consistency
+    @staticmethod
+    def _decode(action_id: int) -> Tuple[int, int]:
+        """Returns (heap size, smaller part) of an action id"""
+        heap_size = (_isqrt(8 * action_id + 1) - 1) // 2
+        return heap_size, action_id - heap_size * (heap_size + 1) // 2
 
-        return GrundysGame(new_heaps, 1 - self.player_to_move)
+    def id_to_action(self, action_id: int) -> str:
+        heap_size, smaller = self._decode(action_id)
+        return f"{self.heaps.index(heap_size)}:{heap_size - smaller},{smaller}"
+
+    def take_action(self, action: str) -> 'GrundysGame':
+        """
+        Takes action in format 'heap_idx:size1,size2' and returns new state.
+        Any unequal split of any heap is accepted, not just the listed ones.
+        """
+        return self.take_action_id(self.action_to_id(action))
+
+    def take_action_id(self, action_id: int) -> 'GrundysGame':
+        heap_size, smaller = self._decode(action_id)
+        new_heaps = list(self.heaps)
+        new_heaps.remove(heap_size)
+        new_heaps.extend([heap_size - smaller, smaller])
+        new_heaps.sort(reverse=True)
+
+        new_state = object.__new__(type(self))
+        new_state.heaps = tuple(new_heaps)
+        new_state.player_to_move = 1 - self.player_to_move
+        return new_state
+
+    def compute_status(self) -> GameStatus:
+        if all(heap_size <= 2 for heap_size in self.heaps):
+            # The player who just moved (not player_to_move) made the last split
+            return GameStatus([], True, (1.0, -1.0) if self.player_to_move == 1 else (-1.0, 1.0))
+        return GameStatus(self.get_legal_action_ids(), False, None)
 
     def is_terminal(self) -> bool:
         """Returns True if no heap can be split further"""
@@ -92,6 +149,16 @@ Note that heaps will sorted after each move in descending order, so the largest
         else:
             return (-1.0, 1.0)
 
+    def _key(self) -> tuple:
+        return (self.heaps, self.player_to_move)
+
+    def to_int(self) -> int:
+        return pack_values(self.heaps) << 1 | self.player_to_move
+
+    @classmethod
+    def from_int(cls, value: int) -> 'GrundysGame':
+        return cls(unpack_values(value >> 1), value & 1)
+
     def get_player_to_move(self) -> int:
         return self.player_to_move
 
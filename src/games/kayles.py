@@ -1,13 +1,29 @@
-from typing import List, Tuple
-from mcts.abstract_game import AbstractGameState
+from typing import Dict, List, Tuple
+from mcts.abstract_game import AbstractGameState, GameStatus
+from games.bitboard import set_bits
 
 class Kayles(AbstractGameState):
-    def __init__(self, pins: List[bool] = None, player_to_move: int = 0):
-        # Initialize with 8 pins by default, or use provided pins
+    """
+    A position is a sum of independent runs of standing pins, so its
+    canonical form lays the runs out longest first, one gap apart. Positions
+    with the same runs in a different order or place share work in caches
+    and solvers.
+    """
+    __slots__ = ('num_pins', 'standing', 'player_to_move')
+
+    def __init__(self, pins: List[bool] = None, player_to_move: int = 0, num_pins: int = 8):
+        # Initialize with num_pins standing pins by default, or use provided pins
         # True represents a standing pin, False represents a removed pin
-        self.pins = pins if pins is not None else [True] * 8
+        pins = pins if pins is not None else [True] * num_pins
+        self.num_pins = len(pins)
+        # Bit i is set if pin i is standing
+        self.standing = sum(1 << i for i, pin in enumerate(pins) if pin)
         self.player_to_move = player_to_move
 
+    @property
+    def pins(self) -> List[bool]:
+        return [bool(self.standing >> i & 1) for i in range(self.num_pins)]
+
     def get_name(self) -> str:
         return "Kayles"
 
@@ -38,48 +54,114 @@ Positions are 0-indexed.
 
     def get_legal_actions(self) -> List[str]:
         """Returns list of legal moves in format 'pos' or 'pos1,pos2'"""
-        actions = []
         # Single pin removals
-        for i in range(len(self.pins)):
-            if self.pins[i]:
-                actions.append(str(i))
-        
+        actions = [str(i) for i in set_bits(self.standing)]
         # Adjacent pair removals
-        for i in range(len(self.pins) - 1):
-            if self.pins[i] and self.pins[i + 1]:
-                actions.append(f"{i},{i+1}")
-        
+        actions.extend(f"{i},{i+1}" for i in set_bits(self.standing & (self.standing >> 1)))
         return actions
 
-    def take_action(self, action: str) -> 'Kayles':
-        """Takes action and returns new state"""
-        new_pins = self.pins.copy()
-        
+    def get_legal_action_ids(self) -> List[int]:
+        """
+        Returns legal moves as ids: i for removing pin i,
+        num_pins + i for removing pins i and i+1
+        """
+        ids = set_bits(self.standing)
+        ids.extend(self.num_pins + i for i in set_bits(self.standing & (self.standing >> 1)))
+        return ids
+
+    def action_to_id(self, action: str) -> int:
         if ',' in action:
-            # Remove two adjacent pins
             pos1, pos2 = map(int, action.split(','))
-            if not (0 <= pos1 < len(self.pins) and 0 <= pos2 < len(self.pins)):
+            if not (0 <= pos1 < self.num_pins and 0 <= pos2 < self.num_pins):
                 raise ValueError("Invalid positions")
             if abs(pos1 - pos2) != 1:
                 raise ValueError("Pins must be adjacent")
-            if not (self.pins[pos1] and self.pins[pos2]):
-                raise ValueError("Pins must be standing")
-            new_pins[pos1] = False
-            new_pins[pos2] = False
-        else:
-            # Remove single pin
-            pos = int(action)
-            if not (0 <= pos < len(self.pins)):
-                raise ValueError("Invalid position")
-            if not self.pins[pos]:
-                raise ValueError("Pin must be standing")
-            new_pins[pos] = False
+            return self.num_pins + min(pos1, pos2)
+        pos = int(action)
+        if not (0 <= pos < self.num_pins):
+            raise ValueError("Invalid position")
+        return pos
+
+    def id_to_action(self, action_id: int) -> str:
+        if action_id < self.num_pins:
+            return str(action_id)
+        i = action_id - self.num_pins
+        return f"{i},{i+1}"
+
+    def _removed_bits(self, action_id: int) -> int:
+        if action_id < self.num_pins:
+            return 1 << action_id
+        return 0b11 << (action_id - self.num_pins)
+
+    def take_action(self, action: str) -> 'Kayles':
+        """Takes action and returns new state"""
+        action_id = self.action_to_id(action)
+        removed = self._removed_bits(action_id)
+        if self.standing & removed != removed:
+            raise ValueError("Pins must be standing" if ',' in action else "Pin must be standing")
+        return self.take_action_id(action_id)
 
-        return Kayles(new_pins, 1 - self.player_to_move)
+    def take_action_id(self, action_id: int) -> 'Kayles':
+        new_state = object.__new__(type(self))
+        new_state.num_pins = self.num_pins
+        new_state.standing = self.standing & ~self._removed_bits(action_id)
+        new_state.player_to_move = 1 - self.player_to_move
+        return new_state
+
+    def _runs(self) -> List[Tuple[int, int]]:
+        """Returns (first pin, length) of each run of standing pins, left to right"""
+        runs = []
+        standing = self.standing
+        while standing:
+            low = standing & -standing
+            # Adding the lowest bit carries through the run and clears it
+            run = standing & ~(standing + low)
+            runs.append((low.bit_length() - 1, bin(run).count("1")))
+            standing ^= run
+        return runs
+
+    def get_components(self) -> Tuple[int, ...]:
+        """Returns the lengths of the runs of standing pins, longest first"""
+        return tuple(sorted((length for _, length in self._runs()), reverse=True))
+
+    def canonical_form(self) -> Tuple['Kayles', Dict[int, int]]:
+        # Longest runs first; runs of equal length keep their order
+        runs = sorted(self._runs(), key=lambda run: -run[1])
+        new_positions = {}
+        standing = 0
+        position = 0
+        for start, length in runs:
+            for offset in range(length):
+                new_positions[start + offset] = position + offset
+            standing |= ((1 << length) - 1) << position
+            position += length + 1
+
+        action_ids = self.get_status().legal_action_ids
+        if standing == self.standing:
+            return self, {action_id: action_id for action_id in action_ids}
+
+        canonical = object.__new__(type(self))
+        canonical.num_pins = self.num_pins
+        canonical.standing = standing
+        canonical.player_to_move = self.player_to_move
+        action_map = {}
+        for action_id in action_ids:
+            if action_id < self.num_pins:
+                action_map[action_id] = new_positions[action_id]
+            else:
+                # A pair stays a pair, since both pins are in the same run
+                action_map[action_id] = self.num_pins + new_positions[action_id - self.num_pins]
+        return canonical, action_map
+
+    def compute_status(self) -> GameStatus:
+        if self.standing == 0:
+            # The player who just moved (not player_to_move) took the last pin
+            return GameStatus([], True, (1.0, -1.0) if self.player_to_move == 1 else (-1.0, 1.0))
+        return GameStatus(self.get_legal_action_ids(), False, None)
 
     def is_terminal(self) -> bool:
         """Returns True if game is over (no pins remain)"""
-        return not any(self.pins)
+        return self.standing == 0
 
     def get_result(self) -> Tuple[float, float]:
         """Returns (1, -1) if player 0 wins, (-1, 1) if player 1 wins"""
@@ -94,6 +176,21 @@ Positions are 0-indexed.
         else:
             return (-1.0, 1.0)
 
+    def _key(self) -> tuple:
+        return (self.num_pins, self.standing, self.player_to_move)
+
+    def to_int(self) -> int:
+        # A marker bit above the pins records how many there are
+        return (1 << self.num_pins | self.standing) << 1 | self.player_to_move
+
+    @classmethod
+    def from_int(cls, value: int) -> 'Kayles':
+        state = object.__new__(cls)
+        state.num_pins = value.bit_length() - 2
+        state.standing = value >> 1 & ((1 << state.num_pins) - 1)
+        state.player_to_move = value & 1
+        return state
+
     def get_player_to_move(self) -> int:
         return self.player_to_move
 
@@ -104,6 +201,15 @@ Positions are 0-indexed.
         for i, pin in enumerate(self.pins):
             result += "| " if pin else "  "
         result += "\n       "
-        for i in range(len(self.pins)):
+        for i in range(self.num_pins):
             result += f"{i} " if i < 10 else f"{i}"
         return result
+
+class Kayles30(Kayles):
+    __slots__ = ()
+
+    def __init__(self, pins: List[bool] = None, player_to_move: int = 0, num_pins: int = 30):
+        super().__init__(pins, player_to_move, num_pins)
+
+    def get_name(self) -> str:
+        return f"Kayles ({self.num_pins} pins)"
@@ -0,0 +1,99 @@
+"""
+Compact binary encodings of game states, for passing states between
+processes and storing them in bulk.
+
+A state is encoded as one tag byte naming its class, followed by the
+little-endian bytes of state.to_int(). Decoding imports the class on
+first use and calls its from_int.
+"""
+import importlib
+from typing import Dict, Iterable, List, Type
+
+from mcts.abstract_game import AbstractGameState
+
+# Tag byte -> 'module:ClassName'. Tags are part of the stored format,
+# so existing tags must never be renumbered or reused.
+_class_paths: Dict[int, str] = {
+    1: "games.tic_tac_toe_uneven:TicTacToeUnevenState",
+    2: "games.tic_tac_toe_uneven:TicTacToe3x4",
+    3: "games.tic_tac_toe_uneven:TicTacToe4x3",
+    4: "games.tic_tac_toe_uneven:TicTacToe6x5with4inrow",
+    5: "games.tic_tac_toe_uneven:TicTacToe5x6with4inrow",
+    6: "games.connect_n:ConnectN",
+    7: "games.connect_n:ConnectThree4x5",
+    8: "games.connect_n:ConnectThree5x4",
+    9: "games.connect_n:ConnectFour6x7",
+    10: "games.domineering:Domineering",
+    11: "games.domineering:Domineering6x6",
+    12: "games.domineering:Domineering8x8",
+    13: "games.coin_counter:CoinCounterGridState",
+    14: "games.kayles:Kayles",
+    15: "games.kayles:Kayles30",
+    16: "games.turning_turtles:TurningTurtles",
+    17: "games.book_nim:BookNim",
+    18: "games.book_nim:BookNimEasy",
+    19: "games.book_nim:BookNimHard",
+    20: "games.wythofs_nim:WythofsNim",
+    21: "games.grundys_game:GrundysGame",
+    22: "games.count_twenty_one:CountToTwentyOne",
+    23: "games.subtract_square:SubtractSquare",
+}
+_tags: Dict[str, int] = {path: tag for tag, path in _class_paths.items()}
+_classes: Dict[int, Type[AbstractGameState]] = {}
+
+def register_codec(tag: int, class_path: str) -> None:
+    """Registers a game class, given as 'module:ClassName', under a new tag byte"""
+    if not 0 < tag < 256:
+        raise ValueError("Tag must fit in one byte")
+    if tag in _class_paths and _class_paths[tag] != class_path:
+        raise ValueError(f"Tag {tag} is already used by {_class_paths[tag]}")
+    _class_paths[tag] = class_path
+    _tags[class_path] = tag
+
+def _game_class(tag: int) -> Type[AbstractGameState]:
+    if tag not in _classes:
+        if tag not in _class_paths:
+            raise ValueError(f"Unknown game tag {tag}")
+        module_name, class_name = _class_paths[tag].split(':')
+        _classes[tag] = getattr(importlib.import_module(module_name), class_name)
+    return _classes[tag]
+
+def encode(state: AbstractGameState) -> bytes:
+    """Returns the tag byte of the state's class followed by the state's int encoding"""
+    game_class = type(state)
+    class_path = f"{game_class.__module__}:{game_class.__name__}"
+    if class_path not in _tags:
+        raise ValueError(f"No codec registered for {class_path}")
+    value = state.to_int()
+    return bytes([_tags[class_path]]) + value.to_bytes((value.bit_length() + 7) // 8, 'little')
+
+def decode(data: bytes) -> AbstractGameState:
+    """Returns the state encoded by encode"""
+    return _game_class(data[0]).from_int(int.from_bytes(data[1:], 'little'))
+
+def pack_values(values: Iterable[int]) -> int:
+    """
+    Packs non-negative values into one int, first value lowest. Every value
+    takes as many bits as the largest one needs; that width is stored in
+    the low byte, and a marker bit above the last value lets unpack_values
+    tell how many there were.
+    """
+    values = list(values)
+    if any(value < 0 for value in values):
+        raise ValueError("Packed values must be non-negative")
+    width = max(1, max((value.bit_length() for value in values), default=1))
+    if width > 0xff:
+        raise ValueError(f"Values of {width} bits are too large to pack")
+    packed = 0
+    shift = 0
+    for value in values:
+        packed |= value << shift
+        shift += width
+    return (packed | 1 << shift) << 8 | width
+
+def unpack_values(packed: int) -> List[int]:
+    """Returns the values packed by pack_values"""
+    width = packed & 0xff
+    packed >>= 8
+    mask = (1 << width) - 1
+    return [packed >> shift & mask for shift in range(0, packed.bit_length() - 1, width)]
@@ -1,5 +1,5 @@
 from typing import List, Tuple
-from mcts.abstract_game import AbstractGameState
+from mcts.abstract_game import AbstractGameState, GameStatus
 
 class SubtractSquare(AbstractGameState):
     """
@@ -8,6 +8,8 @@ class SubtractSquare(AbstractGameState):
     - 
 
     """
+    __slots__ = ('number', 'player_to_move')
+
     def __init__(self, number: int = 13, player_to_move: int = 0):
         self.number = number
         self.player_to_move = player_to_move
@@ -52,9 +54,24 @@ Again, you win if you are the one who reduces the number to 0.
             i += 1
         return actions
 
+    def get_legal_action_ids(self) -> List[int]:
+        """Returns the squares that can be subtracted, as ints"""
+        ids = []
+        i = 1
+        while i * i <= self.number:
+            ids.append(i * i)
+            i += 1
+        return ids
+
+    def action_to_id(self, action: str) -> int:
+        return int(action)
+
+    def id_to_action(self, action_id: int) -> str:
+        return str(action_id)
+
     def take_action(self, action: str) -> 'SubtractSquare':
         """Takes action (a square number) and returns new state"""
-        square = int(action)
+        square = self.action_to_id(action)
 
         # Check not negative
         if square <= 0:
@@ -69,8 +86,17 @@ Again, you win if you are the one who reduces the number to 0.
         if root * root != square:
             raise ValueError("Must subtract a perfect square")
 
+        return self.take_action_id(square)
+
+    def take_action_id(self, square: int) -> 'SubtractSquare':
         return SubtractSquare(self.number - square, 1 - self.player_to_move)
 
+    def compute_status(self) -> GameStatus:
+        if self.number < 1:
+            # The player who just moved (not player_to_move) reached 0
+            return GameStatus([], True, (1.0, -1.0) if self.player_to_move == 1 else (-1.0, 1.0))
+        return GameStatus(self.get_legal_action_ids(), False, None)
+
     def is_terminal(self) -> bool:
         """Returns True if the number is less than 1"""
         return self.number < 1
@@ -86,6 +112,16 @@ Again, you win if you are the one who reduces the number to 0.
         else:
             return (-1.0, 1.0)
 
+    def _key(self) -> tuple:
+        return (self.number, self.player_to_move)
+
+    def to_int(self) -> int:
+        return self.number << 1 | self.player_to_move
+
+    @classmethod
+    def from_int(cls, value: int) -> 'SubtractSquare':
+        return cls(value >> 1, value & 1)
+
     def get_player_to_move(self) -> int:
         return self.player_to_move
 
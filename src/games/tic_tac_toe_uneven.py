@@ -1,13 +1,21 @@
-from typing import List, Tuple
-import copy
-from dataclasses import dataclass
+from typing import Dict, List, Tuple
 
-from mcts.abstract_game import AbstractGameState
+from mcts.abstract_game import GameStatus, InPlaceGameState
+from games.bitboard import cell_names, grid_symmetries, has_line, line_masks, permute_bits, set_bits, zobrist_keys
 
-@dataclass
-class TicTacToeUnevenState(AbstractGameState):
-    board: List[List[str]]
-    player_to_move: int
+class TicTacToeUnevenState(InPlaceGameState):
+    """
+    The board is stored as two bitboards, one per player, with cell (row, col)
+    at bit row * num_cols + col. Whether the last move completed a line is
+    computed once per state, using only the lines through that move.
+
+    The state also keeps a Zobrist key, the XOR of a random key for each
+    (cell, player) piece and one for player 1 to move, which each move
+    updates with two XORs and which serves as the state's hash.
+    """
+    __slots__ = ('num_rows', 'num_cols', 'num_in_a_row', 'player_to_move', 'x_bits', 'o_bits', '_has_win', '_zobrist', '_history')
+
+    symbols = ['X', 'O']
 
     def __init__(
             self,
@@ -20,9 +28,35 @@ class TicTacToeUnevenState(AbstractGameState):
         self.num_rows = num_rows
         self.num_cols = num_cols
         self.num_in_a_row = num_in_a_row
-        self.board = board if board is not None else [['' for _ in range(num_cols)] for _ in range(num_rows)]
         self.player_to_move = player_to_move
-        self.symbols = ['X', 'O']
+        self.x_bits = 0
+        self.o_bits = 0
+        if board is not None:
+            for row in range(num_rows):
+                for col in range(num_cols):
+                    if board[row][col] == 'X':
+                        self.x_bits |= 1 << (row * num_cols + col)
+                    elif board[row][col] == 'O':
+                        self.o_bits |= 1 << (row * num_cols + col)
+        self._derive_fields()
+
+    def _derive_fields(self) -> None:
+        """Sets the fields that follow from the board and player to move"""
+        all_masks, _ = line_masks(self.num_rows, self.num_cols, self.num_in_a_row)
+        self._has_win = has_line(self.x_bits, all_masks) or has_line(self.o_bits, all_masks)
+        self._zobrist = self._compute_zobrist()
+
+    @property
+    def board(self) -> List[List[str]]:
+        return [
+            [
+                'X' if self.x_bits >> (row * self.num_cols + col) & 1
+                else 'O' if self.o_bits >> (row * self.num_cols + col) & 1
+                else ''
+                for col in range(self.num_cols)
+            ]
+            for row in range(self.num_rows)
+        ]
 
     def get_short_game_description(self) -> str:
         return f"""
@@ -59,94 +93,181 @@ You will be playing as {self.symbols[self.player_to_move]}.
 
     def get_legal_actions(self) -> List[str]:
         """Returns list of legal moves in format 'row,col'"""
-        actions = []
-        for row in range(self.num_rows):
-            for col in range(self.num_cols):
-                if self.board[row][col] == '':
-                    actions.append(f"{row},{col}")
-        return actions
+        names = cell_names(self.num_rows, self.num_cols)
+        return [names[cell] for cell in set_bits(self._empty_bits())]
 
-    def take_action(self, action: str) -> 'TicTacToeUnevenState':
-        """Takes action in format 'row,col' and returns new state"""
+    def get_legal_action_ids(self) -> List[int]:
+        """Returns the cells of legal moves, numbered row * num_cols + col"""
+        return set_bits(self._empty_bits())
+
+    def action_to_id(self, action: str) -> int:
         row, col = map(int, action.split(','))
         if not (0 <= row < self.num_rows and 0 <= col < self.num_cols):
             raise ValueError("Invalid position")
-        if self.board[row][col] != '':
+        return row * self.num_cols + col
+
+    def id_to_action(self, action_id: int) -> str:
+        return cell_names(self.num_rows, self.num_cols)[action_id]
+
+    def _zobrist_keys(self) -> Tuple[int, ...]:
+        # Key 2 * cell + player for each piece, and a last key for player 1 to move
+        return zobrist_keys(2 * self.num_rows * self.num_cols + 1)
+
+    def _compute_zobrist(self) -> int:
+        keys = self._zobrist_keys()
+        zobrist = keys[-1] if self.player_to_move == 1 else 0
+        for cell in set_bits(self.x_bits):
+            zobrist ^= keys[2 * cell]
+        for cell in set_bits(self.o_bits):
+            zobrist ^= keys[2 * cell + 1]
+        return zobrist
+
+    def _empty_bits(self) -> int:
+        return ~(self.x_bits | self.o_bits) & ((1 << (self.num_rows * self.num_cols)) - 1)
+
+    def take_action(self, action: str) -> 'TicTacToeUnevenState':
+        """Takes action in format 'row,col' and returns new state"""
+        cell = self.action_to_id(action)
+        if (self.x_bits | self.o_bits) >> cell & 1:
             raise ValueError("Position already occupied")
+        return self.take_action_id(cell)
+
+    def take_action_id(self, cell: int) -> 'TicTacToeUnevenState':
+        new_state = object.__new__(type(self))
+        new_state.num_rows = self.num_rows
+        new_state.num_cols = self.num_cols
+        new_state.num_in_a_row = self.num_in_a_row
+        new_state.player_to_move = 1 - self.player_to_move
+        new_state.x_bits = self.x_bits
+        new_state.o_bits = self.o_bits
+        if self.player_to_move == 0:
+            new_state.x_bits |= 1 << cell
+            mover_bits = new_state.x_bits
+        else:
+            new_state.o_bits |= 1 << cell
+            mover_bits = new_state.o_bits
+        _, cell_masks = line_masks(self.num_rows, self.num_cols, self.num_in_a_row)
+        new_state._has_win = self._has_win or has_line(mover_bits, cell_masks[cell])
+        keys = self._zobrist_keys()
+        new_state._zobrist = self._zobrist ^ keys[2 * cell + self.player_to_move] ^ keys[-1]
+        return new_state
+
+    def copy(self, undoable: bool = True) -> 'TicTacToeUnevenState':
+        new_state = object.__new__(type(self))
+        new_state.num_rows = self.num_rows
+        new_state.num_cols = self.num_cols
+        new_state.num_in_a_row = self.num_in_a_row
+        new_state.player_to_move = self.player_to_move
+        new_state.x_bits = self.x_bits
+        new_state.o_bits = self.o_bits
+        new_state._has_win = self._has_win
+        new_state._zobrist = self._zobrist
+        # Each entry is cell * 2 + the previous win flag
+        new_state._history = [] if undoable else None
+        return new_state
+
+    def apply_action_id(self, cell: int) -> None:
+        if self._history is not None:
+            self._history.append(cell * 2 + self._has_win)
+        if self.player_to_move == 0:
+            self.x_bits |= 1 << cell
+            mover_bits = self.x_bits
+        else:
+            self.o_bits |= 1 << cell
+            mover_bits = self.o_bits
+        if not self._has_win:
+            _, cell_masks = line_masks(self.num_rows, self.num_cols, self.num_in_a_row)
+            self._has_win = has_line(mover_bits, cell_masks[cell])
+        keys = self._zobrist_keys()
+        self._zobrist ^= keys[2 * cell + self.player_to_move] ^ keys[-1]
+        self.player_to_move = 1 - self.player_to_move
+
+    def undo_action(self) -> None:
+        cell, had_win = divmod(self._history.pop(), 2)
+        self.player_to_move = 1 - self.player_to_move
+        if self.player_to_move == 0:
+            self.x_bits &= ~(1 << cell)
+        else:
+            self.o_bits &= ~(1 << cell)
+        self._has_win = bool(had_win)
+        keys = self._zobrist_keys()
+        self._zobrist ^= keys[2 * cell + self.player_to_move] ^ keys[-1]
+
+    def _key(self) -> tuple:
+        return (self.num_rows, self.num_cols, self.num_in_a_row, self.x_bits, self.o_bits, self.player_to_move)
+
+    def to_int(self) -> int:
+        # Rows, columns and line length take a byte each, then the player and both bitboards
+        num_cells = self.num_rows * self.num_cols
+        bits = (self.o_bits << num_cells | self.x_bits) << 1 | self.player_to_move
+        return bits << 24 | self.num_in_a_row << 16 | self.num_cols << 8 | self.num_rows
+
+    @classmethod
+    def from_int(cls, value: int) -> 'TicTacToeUnevenState':
+        state = object.__new__(cls)
+        state.num_rows = value & 0xff
+        state.num_cols = value >> 8 & 0xff
+        state.num_in_a_row = value >> 16 & 0xff
+        value >>= 24
+        num_cells = state.num_rows * state.num_cols
+        state.player_to_move = value & 1
+        state.x_bits = value >> 1 & ((1 << num_cells) - 1)
+        state.o_bits = value >> (1 + num_cells)
+        state._derive_fields()
+        return state
 
-        new_board = copy.deepcopy(self.board)
-        new_board[row][col] = 'X' if self.player_to_move == 0 else 'O'
-        return TicTacToeUnevenState(
-            new_board,
-            player_to_move=1 - self.player_to_move,
-            num_rows=self.num_rows,
-            num_cols=self.num_cols,
-            num_in_a_row=self.num_in_a_row
-        )
+    def canonical_form(self) -> Tuple['TicTacToeUnevenState', Dict[int, int]]:
+        """
+        The canonical state is the reflection or rotation of the board with
+        the smallest (x_bits, o_bits).
+        """
+        best_bits, best_perm = (self.x_bits, self.o_bits), None
+        for perm in grid_symmetries(self.num_rows, self.num_cols)[1:]:
+            bits = (permute_bits(self.x_bits, perm), permute_bits(self.o_bits, perm))
+            if bits < best_bits:
+                best_bits, best_perm = bits, perm
+        action_ids = self.get_status().legal_action_ids
+        if best_perm is None:
+            return self, {cell: cell for cell in action_ids}
+
+        canonical = object.__new__(type(self))
+        canonical.num_rows = self.num_rows
+        canonical.num_cols = self.num_cols
+        canonical.num_in_a_row = self.num_in_a_row
+        canonical.player_to_move = self.player_to_move
+        canonical.x_bits, canonical.o_bits = best_bits
+        canonical._has_win = self._has_win
+        canonical._zobrist = canonical._compute_zobrist()
+        return canonical, {cell: best_perm[cell] for cell in action_ids}
+
+    def __hash__(self) -> int:
+        return self._zobrist
 
     def _check_win(self) -> bool:
         """Check if current state is a win for either player"""
-        # Check rows
-        for row in range(self.num_rows):
-            for col in range(self.num_cols - self.num_in_a_row + 1):
-                if (self.board[row][col] != ''):
-                    # Check if there are {self.num_in_a_row} consecutive symbols in the row
-                    # in the same direction
-                    valid = all([
-                        self.board[row][col+i] == self.board[row][col]
-                        for i in range(self.num_in_a_row)
-                    ])
-                    if valid:
-                        return True
-
-        # Check columns
-        for row in range(self.num_rows - self.num_in_a_row + 1):
-            for col in range(self.num_cols):
-                if (self.board[row][col] != ''):
-                    valid = all([
-                        self.board[row+i][col] == self.board[row][col]
-                        for i in range(self.num_in_a_row)
-                    ])
-                    if valid:
-                        return True
-
-        # Check diagonals
-        # Down-right diagonals
-        for row in range(self.num_rows - self.num_in_a_row + 1):
-            for col in range(self.num_cols - self.num_in_a_row + 1):
-                if (self.board[row][col] != ''):
-                    valid = all([
-                        self.board[row+i][col+i] == self.board[row][col]
-                        for i in range(self.num_in_a_row)
-                    ])
-                    if valid:
-                        return True
-
-        # Down-left diagonals
-        for row in range(self.num_rows - self.num_in_a_row + 1):
-            for col in range(self.num_cols - 1, self.num_in_a_row - 2, -1):
-                if (self.board[row][col] != ''):
-                    valid = all([
-                        self.board[row+i][col-i] == self.board[row][col]
-                        for i in range(self.num_in_a_row)
-                    ])
-                    if valid:
-                        return True
-
-        return False
+        return self._has_win
+
+    def compute_status(self) -> GameStatus:
+        if self._has_win:
+            # The player who just moved (not player_to_move) made the line
+            return GameStatus([], True, (1.0, -1.0) if self.player_to_move == 1 else (-1.0, 1.0))
+        empty = self._empty_bits()
+        if empty == 0:
+            return GameStatus([], True, (0.0, 0.0))
+        return GameStatus(set_bits(empty), False, None)
 
     def is_terminal(self) -> bool:
         """Returns True if game is over"""
-        if self._check_win():
+        if self._has_win:
             return True
-        return len(self.get_legal_actions()) == 0
+        return self._empty_bits() == 0
 
     def get_result(self) -> Tuple[float, float]:
         """Returns (1, -1) if player 0 wins, (-1, 1) if player 1 wins"""
         if not self.is_terminal():
             raise ValueError("Game is not over")
         
-        if self._check_win():
+        if self._has_win:
             # If it's player 1's turn, player 0 just moved and won
             if self.player_to_move == 1:
                 return (1.0, -1.0)
@@ -166,10 +287,11 @@ You will be playing as {self.symbols[self.player_to_move]}.
         # Add column numbers
         result += "Board:\n"
         result += "  " + "   ".join(str(i) for i in range(self.num_cols)) + "\n"
+        board = self.board
         for row in range(self.num_rows):
             # Add row number
             result += f"{row} "
-            result += " | ".join(cell if cell != '' else ' ' for cell in self.board[row])
+            result += " | ".join(cell if cell != '' else ' ' for cell in board[row])
             if row < self.num_rows - 1:
                 result += "\n" + "  " + "-" * (self.num_cols * 4 - 2) + "\n"
         return result
@@ -182,6 +304,8 @@ class TicTacToe3x4(TicTacToeUnevenState):
     """
     Tic Tac Toe on a 3x4 grid with 3-in-a-row
     """
+    __slots__ = ()
+
     def __init__(self, board: List[List[str]] = None, player_to_move: int = 0):
         super().__init__(board, player_to_move, num_rows=3, num_cols=4, num_in_a_row=3)
 
@@ -189,6 +313,8 @@ class TicTacToe4x3(TicTacToeUnevenState):
     """
     Tic Tac Toe on a 4x3 grid with 3-in-a-row
     """
+    __slots__ = ()
+
     def __init__(self, board: List[List[str]] = None, player_to_move: int = 0):
         super().__init__(board, player_to_move, num_rows=4, num_cols=3, num_in_a_row=3)
 
@@ -196,6 +322,8 @@ class TicTacToe6x5with4inrow(TicTacToeUnevenState):
     """
     Tic Tac Toe on a 6x5 grid with 4-in-a-row
     """
+    __slots__ = ()
+
     def __init__(self, board: List[List[str]] = None, player_to_move: int = 0):
         super().__init__(board, player_to_move, num_rows=6, num_cols=5, num_in_a_row=4)
 
@@ -203,5 +331,7 @@ class TicTacToe5x6with4inrow(TicTacToeUnevenState):
     """
     Tic Tac Toe on a 5x6 grid with 4-in-a-row
     """
+    __slots__ = ()
+
     def __init__(self, board: List[List[str]] = None, player_to_move: int = 0):
         super().__init__(board, player_to_move, num_rows=5, num_cols=6, num_in_a_row=4)
@@ -1,15 +1,23 @@
 from typing import List, Tuple
-from mcts.abstract_game import AbstractGameState
+from mcts.abstract_game import AbstractGameState, GameStatus
+from games.bitboard import set_bits
 
 class TurningTurtles(AbstractGameState):
+    __slots__ = ('num_coins', 'heads', 'player_to_move')
+
     def __init__(self, coins: List[bool] = None, player_to_move: int = 0):
         # True represents heads (H), False represents tails (T)
         if coins is None:
-            self.coins = [True for i in range(5)] 
-        else:
-            self.coins = coins
+            coins = [True for i in range(5)]
+        self.num_coins = len(coins)
+        # Bit i is set if coin i shows heads
+        self.heads = sum(1 << i for i, coin in enumerate(coins) if coin)
         self.player_to_move = player_to_move
 
+    @property
+    def coins(self) -> List[bool]:
+        return [bool(self.heads >> i & 1) for i in range(self.num_coins)]
+
     def get_name(self) -> str:
         return "Turning Turtles"
 
@@ -42,49 +50,71 @@ Positions are 0-indexed.
 
     def get_legal_actions(self) -> List[str]:
         """Returns list of legal moves in format 'pos' or 'leftpos,rightpos'"""
-        actions = []
+        heads = set_bits(self.heads)
         # Single flips (H->T only)
-        for i in range(len(self.coins)):
-            if self.coins[i]:  # if heads
-                actions.append(str(i))
+        actions = [str(i) for i in heads]
         
         # Double flips (right coin must be H, left coin can be either)
-        for right in range(len(self.coins)):
-            if self.coins[right]:  # if right coin is heads
-                for left in range(right):  # any coin to the left
-                    actions.append(f"{left},{right}")
+        for right in heads:
+            for left in range(right):  # any coin to the left
+                actions.append(f"{left},{right}")
         
         return actions
 
-    def take_action(self, action: str) -> 'TurningTurtles':
-        """Takes action and returns new state"""
-        new_coins = self.coins.copy()
-        
+    def get_legal_action_ids(self) -> List[int]:
+        """
+        Returns legal moves as ids: pos * num_coins + pos for a single flip,
+        left * num_coins + right for a double flip
+        """
+        n = self.num_coins
+        heads = set_bits(self.heads)
+        ids = [i * n + i for i in heads]
+        for right in heads:
+            ids.extend(left * n + right for left in range(right))
+        return ids
+
+    def action_to_id(self, action: str) -> int:
         if ',' in action:
-            # Flip two coins
             left, right = map(int, action.split(','))
-            if not (0 <= left < len(self.coins) and 0 <= right < len(self.coins)):
+            if not (0 <= left < self.num_coins and 0 <= right < self.num_coins):
                 raise ValueError("Invalid positions")
             if left >= right:
                 raise ValueError("Left position must be less than right position")
-            if not self.coins[right]:
-                raise ValueError("Right coin must be heads")
-            new_coins[left] = not new_coins[left]  # flip left coin
-            new_coins[right] = False  # flip right coin to tails
-        else:
-            # Flip single coin from heads to tails
-            pos = int(action)
-            if not (0 <= pos < len(self.coins)):
-                raise ValueError("Invalid position")
-            if not self.coins[pos]:
-                raise ValueError("Coin must be heads")
-            new_coins[pos] = False
+            return left * self.num_coins + right
+        pos = int(action)
+        if not (0 <= pos < self.num_coins):
+            raise ValueError("Invalid position")
+        return pos * self.num_coins + pos
 
-        return TurningTurtles(new_coins, 1 - self.player_to_move)
+    def id_to_action(self, action_id: int) -> str:
+        left, right = divmod(action_id, self.num_coins)
+        return str(right) if left == right else f"{left},{right}"
+
+    def take_action(self, action: str) -> 'TurningTurtles':
+        """Takes action and returns new state"""
+        action_id = self.action_to_id(action)
+        if not self.heads >> (action_id % self.num_coins) & 1:
+            raise ValueError("Right coin must be heads" if ',' in action else "Coin must be heads")
+        return self.take_action_id(action_id)
+
+    def take_action_id(self, action_id: int) -> 'TurningTurtles':
+        # Flip right coin to tails, and flip left coin either way
+        left, right = divmod(action_id, self.num_coins)
+        new_state = object.__new__(type(self))
+        new_state.num_coins = self.num_coins
+        new_state.heads = self.heads ^ ((1 << left) | (1 << right))
+        new_state.player_to_move = 1 - self.player_to_move
+        return new_state
+
+    def compute_status(self) -> GameStatus:
+        if self.heads == 0:
+            # The player who just moved (not player_to_move) flipped the last head
+            return GameStatus([], True, (1.0, -1.0) if self.player_to_move == 1 else (-1.0, 1.0))
+        return GameStatus(self.get_legal_action_ids(), False, None)
 
     def is_terminal(self) -> bool:
         """Returns True if game is over (no heads remain)"""
-        return not any(self.coins)
+        return self.heads == 0
 
     def get_result(self) -> Tuple[float, float]:
         """Returns (1, -1) if player 0 wins, (-1, 1) if player 1 wins"""
@@ -99,6 +129,21 @@ Positions are 0-indexed.
         else:
             return (-1.0, 1.0)
 
+    def _key(self) -> tuple:
+        return (self.num_coins, self.heads, self.player_to_move)
+
+    def to_int(self) -> int:
+        # A marker bit above the coins records how many there are
+        return (1 << self.num_coins | self.heads) << 1 | self.player_to_move
+
+    @classmethod
+    def from_int(cls, value: int) -> 'TurningTurtles':
+        state = object.__new__(cls)
+        state.num_coins = value.bit_length() - 2
+        state.heads = value >> 1 & ((1 << state.num_coins) - 1)
+        state.player_to_move = value & 1
+        return state
+
     def get_player_to_move(self) -> int:
         return self.player_to_move
 
@@ -109,6 +154,6 @@ Positions are 0-indexed.
         for coin in self.coins:
             result += "H " if coin else "T "
         result += "\n       "
-        for i in range(len(self.coins)):
+        for i in range(self.num_coins):
             result += f"{i} " if i < 10 else f"{i}"
         return result
@@ -1,17 +1,15 @@
 from typing import List, Tuple
-import copy
-from dataclasses import dataclass
 
-from mcts.abstract_game import AbstractGameState
+from mcts.abstract_game import AbstractGameState, GameStatus
+from games.state_codec import pack_values, unpack_values
 
-@dataclass
 class WythofsNim(AbstractGameState):
-    piles: List[int]  # Will always have exactly 2 piles
-    player_to_move: int
+    # piles always holds exactly 2 piles
+    __slots__ = ('piles', 'player_to_move')
 
     def __init__(self, piles: List[int] = None, player_to_move: int = 0):
-        # Initialize with [5, 6] by default, or use provided piles
-        self.piles = piles if piles is not None else [5, 6]
+        # Initialize with (5, 6) by default, or use provided piles
+        self.piles = tuple(piles) if piles is not None else (5, 6)
         if len(self.piles) != 2:
             raise ValueError("Wythof's Nim must have exactly 2 piles")
         self.player_to_move = player_to_move
@@ -60,31 +58,64 @@ To make a move, specify:
         
         return actions
 
-    def take_action(self, action: str) -> 'WythofsNim':
-        """Takes action and returns new state"""
+    def get_legal_action_ids(self) -> List[int]:
+        """
+        Returns legal moves as ids tokens * 3 + kind, where kind is
+        the pile number, or 2 for taking from both piles
+        """
+        ids = [tokens * 3 + pile for pile in range(2) for tokens in range(1, self.piles[pile] + 1)]
+        ids.extend(tokens * 3 + 2 for tokens in range(1, min(self.piles) + 1))
+        return ids
+
+    def action_to_id(self, action: str) -> int:
         pile_or_both, tokens = action.split(',')
         tokens = int(tokens)
-        
-        new_piles = copy.deepcopy(self.piles)
-        
         if pile_or_both == 'both':
+            return tokens * 3 + 2
+        pile = int(pile_or_both)
+        if not (0 <= pile < 2):
+            raise ValueError("Invalid pile number")
+        return tokens * 3 + pile
+
+    def id_to_action(self, action_id: int) -> str:
+        tokens, kind = divmod(action_id, 3)
+        return f"both,{tokens}" if kind == 2 else f"{kind},{tokens}"
+
+    def take_action(self, action: str) -> 'WythofsNim':
+        """Takes action and returns new state"""
+        action_id = self.action_to_id(action)
+        tokens, kind = divmod(action_id, 3)
+        if kind == 2:
             if tokens > min(self.piles):
                 raise ValueError("Cannot remove more tokens than in either pile")
-            new_piles[0] -= tokens
-            new_piles[1] -= tokens
+        elif tokens > self.piles[kind]:
+            raise ValueError("Cannot remove more tokens than in pile")
+        return self.take_action_id(action_id)
+
+    def take_action_id(self, action_id: int) -> 'WythofsNim':
+        tokens, kind = divmod(action_id, 3)
+        pile_0, pile_1 = self.piles
+        if kind == 2:
+            new_piles = (pile_0 - tokens, pile_1 - tokens)
+        elif kind == 0:
+            new_piles = (pile_0 - tokens, pile_1)
         else:
-            pile = int(pile_or_both)
-            if not (0 <= pile < 2):
-                raise ValueError("Invalid pile number")
-            if tokens > self.piles[pile]:
-                raise ValueError("Cannot remove more tokens than in pile")
-            new_piles[pile] -= tokens
-            
-        return WythofsNim(new_piles, 1 - self.player_to_move)
+            new_piles = (pile_0, pile_1 - tokens)
+
+        new_state = object.__new__(type(self))
+        new_state.piles = new_piles
+        new_state.player_to_move = 1 - self.player_to_move
+        return new_state
+
+    def compute_status(self) -> GameStatus:
+        if self.piles == (0, 0):
+            # The player who just moved (not player_to_move) took the last token
+            return GameStatus([], True, (1.0, -1.0) if self.player_to_move == 1 else (-1.0, 1.0))
+        return GameStatus(self.get_legal_action_ids(), False, None)
 
     def is_terminal(self) -> bool:
         """Returns True if game is over (no tokens remain)"""
-        return sum(self.piles) == 0
+        return self.piles == (0, 0)
 
     def get_result(self) -> Tuple[float, float]:
         """Returns (1, -1) if player 0 wins, (-1, 1) if player 1 wins"""
@@ -99,6 +130,16 @@ To make a move, specify:
         else:
             return (-1.0, 1.0)
 
+    def _key(self) -> tuple:
+        return (self.piles, self.player_to_move)
+
+    def to_int(self) -> int:
+        return pack_values(self.piles) << 1 | self.player_to_move
+
+    @classmethod
+    def from_int(cls, value: int) -> 'WythofsNim':
+        return cls(unpack_values(value >> 1), value & 1)
+
     def get_player_to_move(self) -> int:
         return self.player_to_move
 
@@ -11,7 +11,7 @@ class AnthropicAPI(BaseLLM):
         model: str = "claude-3-5-sonnet-20241022"
     ):
         super().__init__(api_key, temperature, max_tokens)
-        self.client = anthropic.Anthropic(api_key=api_key)
+        self.client = anthropic.AsyncAnthropic(api_key=api_key)
         self.model = model
 
     async def __call__(self, messages: List[Dict[str, Any]], **kwargs):
@@ -33,7 +33,7 @@ class AnthropicAPI(BaseLLM):
 
         #print(messages)
         
-        response = self.client.messages.create(
+        response = await self.client.messages.create(
             model=self.model,
             messages=messages,
             temperature=self.temperature,
@@ -41,3 +41,6 @@ class AnthropicAPI(BaseLLM):
             **kwargs
         )
         return response.content[0].text
+
+    async def close(self) -> None:
+        await self.client.close()
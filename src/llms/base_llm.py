@@ -32,6 +32,10 @@ class BaseLLM(ABC):
         """
         pass
 
+    async def close(self) -> None:
+        """Release any connections held by the client."""
+        pass
+
     def validate_messages(self, messages: List[Dict[str, Any]], valid_roles: set) -> None:
         """Validate message format.
         
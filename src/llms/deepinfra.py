@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 from typing import List, Dict, Any, Optional
 from llms.base_llm import BaseLLM
 
@@ -11,7 +11,7 @@ class DeepInfraAPI(BaseLLM):
         model: str = "Qwen/Qwen3-30B-A3B"
     ):
         super().__init__(api_key, temperature, max_tokens)
-        self.client = OpenAI(
+        self.client = AsyncOpenAI(
             api_key=api_key,
             base_url="https://api.deepinfra.com/v1/openai/"
         )
@@ -23,7 +23,7 @@ class DeepInfraAPI(BaseLLM):
         self.validate_messages(messages, {'system', 'user', 'assistant'})
         
         print("Sending request to DeepInfra")
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=self.temperature,
@@ -31,4 +31,7 @@ class DeepInfraAPI(BaseLLM):
             **kwargs
         )
         print(response.choices[0].message.content)
-        return response.choices[0].message.content
\ No newline at end of file
+        return response.choices[0].message.content
+
+    async def close(self) -> None:
+        await self.client.close()
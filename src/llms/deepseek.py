@@ -1,8 +1,8 @@
 import asyncio
 from typing import List, Dict, Any, Optional
-from aiohttp import ClientSession
 import json
 
+from llms import http_pool
 from llms.base_llm import BaseLLM
 
 class DeepseekAPI(BaseLLM):
@@ -21,16 +21,10 @@ class DeepseekAPI(BaseLLM):
         super().__init__(api_key, temperature, max_tokens)
         self.base_url = "https://api.deepseek.com/v1/chat/completions"
         self.model = model
-        self._session: Optional[ClientSession] = None
-
-    async def _ensure_session(self) -> ClientSession:
-        """Ensure an aiohttp session exists and return it."""
-        if self._session is None or self._session.closed:
-            self._session = ClientSession(headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            })
-        return self._session
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
 
     async def __call__(
         self,
@@ -52,44 +46,24 @@ class DeepseekAPI(BaseLLM):
         if any(message["role"] == "system" for message in messages):
             raise ValueError("System prompt must be in the first message")
 
-        # Create a new session for each call if none exists
-        should_close_session = self._session is None
-        session = await self._ensure_session()
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens
+        }
         
-        try:
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": self.temperature,
-                "max_tokens": self.max_tokens
-            }
-            
-            # Add system prompt to payload if it exists
-            if system_prompt:
-                payload["system"] = system_prompt
-                
-            # Add any additional kwargs
-            payload.update(kwargs)
+        # Add system prompt to payload if it exists
+        if system_prompt:
+            payload["system"] = system_prompt
             
-            async with session.post(self.base_url, json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"API request failed: {error_text}")
-                values = await response.json()
-                return values['choices'][0]['message']['content']
-        finally:
-            if should_close_session:
-                await self.close()
-
-    async def close(self):
-        """Close the API client session."""
-        if self._session and not self._session.closed:
-            await self._session.close()
-
-    async def __aenter__(self):
-        """Support async context manager protocol."""
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Clean up resources when exiting context."""
-        await self.close()
\ No newline at end of file
+        # Add any additional kwargs
+        payload.update(kwargs)
+        
+        session = http_pool.get_session()
+        async with session.post(self.base_url, json=payload, headers=self.headers) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"API request failed: {error_text}")
+            values = await response.json()
+            return values['choices'][0]['message']['content']
\ No newline at end of file
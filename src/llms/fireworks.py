@@ -1,8 +1,8 @@
 import asyncio
 from typing import List, Dict, Any, Optional
-from aiohttp import ClientSession
 import json
 
+from llms import http_pool
 from llms.base_llm import BaseLLM
 
 class FireworksAPI(BaseLLM):
@@ -24,16 +24,11 @@ class FireworksAPI(BaseLLM):
         self.presence_penalty = presence_penalty
         self.frequency_penalty = frequency_penalty
         self.base_url = "https://api.fireworks.ai/inference/v1/chat/completions"
-        self._session: Optional[ClientSession] = None
-
-    async def _ensure_session(self) -> ClientSession:
-        if self._session is None or self._session.closed:
-            self._session = ClientSession(headers={
-                "Authorization": f"Bearer {self.api_key}",
-                "Accept": "application/json",
-                "Content-Type": "application/json"
-            })
-        return self._session
+        self.headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Accept": "application/json",
+            "Content-Type": "application/json"
+        }
 
     async def __call__(
         self,
@@ -42,9 +37,6 @@ class FireworksAPI(BaseLLM):
     ) -> str:
         self.validate_messages(messages, {'system', 'user', 'assistant'})
 
-        should_close_session = self._session is None
-        session = await self._ensure_session()
-
         payload = {
             "model": self.model,
             "max_tokens": self.max_tokens,
@@ -57,25 +49,12 @@ class FireworksAPI(BaseLLM):
         }
         payload.update(kwargs)
 
-        try:
-            async with session.post(self.base_url, json=payload) as response:
-                if response.status != 200:
-                    error_text = await response.text()
-                    raise Exception(f"Fireworks API request failed: {error_text}")
-                values = await response.json()
-                text = values['choices'][0]['message']['content']
-                #print(text[-20:])
-                return text
-        finally:
-            if should_close_session:
-                await self.close()
-
-    async def close(self):
-        if self._session and not self._session.closed:
-            await self._session.close()
-
-    async def __aenter__(self):
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.close()
+        session = http_pool.get_session()
+        async with session.post(self.base_url, json=payload, headers=self.headers) as response:
+            if response.status != 200:
+                error_text = await response.text()
+                raise Exception(f"Fireworks API request failed: {error_text}")
+            values = await response.json()
+            text = values['choices'][0]['message']['content']
+            #print(text[-20:])
+            return text
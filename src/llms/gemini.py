@@ -1,7 +1,7 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 from typing import List, Dict, Any, Optional
 from llms.base_llm import BaseLLM
-import time
+import asyncio
 
 class GeminiAPI(BaseLLM):
     def __init__(
@@ -12,7 +12,7 @@ class GeminiAPI(BaseLLM):
         model: str = "gemini-2.5-pro-exp-03-25"
     ):
         super().__init__(api_key, temperature, max_tokens)
-        self.client = OpenAI(
+        self.client = AsyncOpenAI(
             api_key=api_key,
             base_url="https://generativelanguage.googleapis.com/v1beta/openai/"
         )
@@ -22,13 +22,16 @@ class GeminiAPI(BaseLLM):
 
     async def __call__(self, messages: List[Dict[str, Any]], **kwargs):
         self.validate_messages(messages, {'system', 'user', 'assistant'})
-        time.sleep(1)
+        await asyncio.sleep(1)
         
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
             **kwargs
         )
-        return response.choices[0].message.content
\ No newline at end of file
+        return response.choices[0].message.content
+
+    async def close(self) -> None:
+        await self.client.close()
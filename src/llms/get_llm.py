@@ -1,65 +1,56 @@
+import importlib
 import os
+from typing import Dict, Tuple
 
+from llms import http_pool
 from llms.base_llm import BaseLLM
-from llms.deepseek import DeepseekAPI
-from llms.anthropic import AnthropicAPI
-from llms.openai import OpenAIAPI
-from llms.human_terminal import HumanTerminal
-from llms.gemini import GeminiAPI
-from llms.together import TogetherAPI
-from llms.deepinfra import DeepInfraAPI
-from llms.fireworks import FireworksAPI
+
+# Model prefix -> (module, class, environment variable holding the API key).
+# A backend's module, and the SDK it uses, is only imported when its prefix
+# is requested, so a missing optional SDK only breaks runs that need it.
+providers: Dict[str, Tuple[str, str, str]] = {
+    "anthropic": ("llms.anthropic", "AnthropicAPI", "ANTHROPIC_API_KEY"),
+    "deepseek": ("llms.deepseek", "DeepseekAPI", "DEEPSEEK_API_KEY"),
+    "openai": ("llms.openai", "OpenAIAPI", "OPENAI_API_KEY"),
+    "together": ("llms.together", "TogetherAPI", "TOGETHER_API_KEY"),
+    "gemini": ("llms.gemini", "GeminiAPI", "GEMINI_API_KEY"),
+    "deepinfra": ("llms.deepinfra", "DeepInfraAPI", "DEEPINFRA_API_KEY"),
+    "fireworks": ("llms.fireworks", "FireworksAPI", "FIREWORKS_API_KEY"),
+}
+
+# (model, temperature) -> client, so every turn of every game with a model
+# reuses one client and its connections
+_clients: Dict[Tuple[str, float], BaseLLM] = {}
 
 def get_llm(
     model: str,
     temperature: float = 0.7
 ) -> BaseLLM:
+    key = (model, temperature)
+    if key not in _clients:
+        _clients[key] = _create_llm(model, temperature)
+    return _clients[key]
+
+async def close_llms():
+    """Closes every cached client and the shared HTTP session"""
+    for llm in _clients.values():
+        await llm.close()
+    _clients.clear()
+    await http_pool.close()
+
+def _create_llm(model: str, temperature: float) -> BaseLLM:
+    if model == 'human_terminal':
+        from llms.human_terminal import HumanTerminal
+        return HumanTerminal()
 
-    if model.startswith("anthropic:"):
-        llm = AnthropicAPI(
-            os.getenv("ANTHROPIC_API_KEY"),
-            temperature=temperature,
-            model=model.split(":")[1]
-        )
-    elif model.startswith("deepseek:"):
-        llm = DeepseekAPI(
-            os.getenv("DEEPSEEK_API_KEY"),
-            temperature=temperature,
-            model=model.split(":")[1]
-        )
-    elif model.startswith("openai:"):
-        llm = OpenAIAPI(
-            os.getenv("OPENAI_API_KEY"),
-            temperature=temperature,
-            model=model.split(":")[1]
-        )
-    elif model.startswith("together:"):
-        llm = TogetherAPI(
-            os.getenv("TOGETHER_API_KEY"),
-            temperature=temperature,
-            model=model.split(":")[1]
-        )
-    elif model.startswith("gemini:"):
-        llm = GeminiAPI(
-            os.getenv("GEMINI_API_KEY"),
-            temperature=temperature,
-            model=model.split(":")[1]
-        )
-    elif model.startswith("deepinfra:"):
-        llm = DeepInfraAPI(
-            os.getenv("DEEPINFRA_API_KEY"),
-            temperature=temperature,
-            model=model.split(":")[1]
-        )
-    elif model.startswith("fireworks:"):
-        llm = FireworksAPI(
-            os.getenv("FIREWORKS_API_KEY"),
-            temperature=temperature,
-            model=model.split(":")[1]
-        )
-    elif model == 'human_terminal':
-        llm = HumanTerminal()
-    else:
+    prefix, _, model_name = model.partition(":")
+    if prefix not in providers or not model_name:
         raise ValueError(f"Invalid model: {model}")
 
-    return llm
+    module_name, class_name, api_key_env = providers[prefix]
+    llm_class = getattr(importlib.import_module(module_name), class_name)
+    return llm_class(
+        os.getenv(api_key_env),
+        temperature=temperature,
+        model=model_name
+    )
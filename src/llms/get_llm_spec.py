@@ -0,0 +1,39 @@
+import asyncio
+
+import pytest
+
+from llms import http_pool
+from llms.get_llm import close_llms, get_llm
+
+def test_get_llm_caches_clients_per_model_and_temperature():
+    llm = get_llm("human_terminal")
+    assert get_llm("human_terminal") is llm
+    assert get_llm("human_terminal", temperature=0.2) is not llm
+    asyncio.run(close_llms())
+    assert get_llm("human_terminal") is not llm
+
+def test_get_llm_rejects_unknown_models():
+    for model in ["nonsense:model", "anthropic", "anthropic:"]:
+        with pytest.raises(ValueError):
+            get_llm(model)
+
+def test_close_llms_closes_the_shared_session():
+    pytest.importorskip("aiohttp")
+
+    async def run():
+        http_pool.configure(limit=5, limit_per_host=2)
+        session = http_pool.get_session()
+        assert http_pool.get_session() is session
+        assert session.connector.limit == 5
+        assert session.connector.limit_per_host == 2
+        # Limits can't change under an open session
+        with pytest.raises(ValueError):
+            http_pool.configure(limit=10)
+        get_llm("human_terminal")
+        await close_llms()
+        return session
+
+    session = asyncio.run(run())
+    assert session.closed
+    # Closed, so the limits can be changed again
+    http_pool.configure()
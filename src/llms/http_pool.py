@@ -0,0 +1,37 @@
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import aiohttp
+
+# One keep-alive connection pool shared by the aiohttp backends for the whole
+# run, so a move does not pay for a new TCP and TLS handshake. Backends pass
+# their own headers on each request. aiohttp is only imported when the
+# session is created, so configuring and closing the pool work without it.
+
+_limits = {"limit": 100, "limit_per_host": 0, "keepalive_timeout": 120.0}
+_session = None
+
+def configure(limit: int = 100, limit_per_host: int = 0, keepalive_timeout: float = 120.0):
+    """
+    Sets the connection limits used when the session is created.
+    limit is the total number of open connections and limit_per_host the
+    number per host; 0 means no limit.
+    """
+    if _session is not None and not _session.closed:
+        raise ValueError("The HTTP session is already open")
+    _limits.update(limit=limit, limit_per_host=limit_per_host, keepalive_timeout=keepalive_timeout)
+
+def get_session() -> 'aiohttp.ClientSession':
+    """Returns the shared session, creating it on first use"""
+    global _session
+    if _session is None or _session.closed:
+        from aiohttp import ClientSession, TCPConnector
+        _session = ClientSession(connector=TCPConnector(**_limits))
+    return _session
+
+async def close():
+    """Closes the shared session, if one is open"""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
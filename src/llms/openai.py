@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 from typing import List, Dict, Any, Optional
 from llms.base_llm import BaseLLM
 
@@ -11,17 +11,20 @@ class OpenAIAPI(BaseLLM):
         model: str = "gpt-4o"
     ):
         super().__init__(api_key, temperature, max_tokens)
-        self.client = OpenAI(api_key=api_key)
+        self.client = AsyncOpenAI(api_key=api_key)
         self.model = model
 
     async def __call__(self, messages: List[Dict[str, Any]], **kwargs):
         self.validate_messages(messages, {'system', 'user', 'assistant'})
         
-        response = self.client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
             **kwargs
         )
-        return response.choices[0].message.content
\ No newline at end of file
+        return response.choices[0].message.content
+
+    async def close(self) -> None:
+        await self.client.close()
@@ -1,7 +1,6 @@
-from together import Together
+from together import AsyncTogether
 from typing import List, Dict, Any
 from llms.base_llm import BaseLLM
-import requests
 
 class TogetherAPI(BaseLLM):
     def __init__(
@@ -14,12 +13,12 @@ class TogetherAPI(BaseLLM):
         super().__init__(api_key, temperature, max_tokens)
         self.key = api_key
         self.model = model
+        self.client = AsyncTogether(api_key=self.key)
 
     async def __call__(self, messages: List[Dict[str, Any]]):
         self.validate_messages(messages, {'system', 'user', 'assistant'})
 
-        client = Together(api_key=self.key)
-        response = client.chat.completions.create(
+        response = await self.client.chat.completions.create(
             model=self.model,
             messages=messages,
             max_tokens=self.max_tokens,
@@ -1,5 +1,21 @@
 import abc
-from typing import List, Tuple
+import threading
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+# Per game class: (action string -> id, id -> action string), for games
+# that do not define their own action ids
+_interned_actions: Dict[type, Tuple[Dict[str, int], List[str]]] = {}
+# Held while assigning new ids, since ponder threads and concurrent games
+# intern actions at the same time
+_interned_actions_lock = threading.Lock()
+
+class GameStatus(NamedTuple):
+    """Everything a search needs to know about a state before moving from it"""
+    # Empty if the state is terminal
+    legal_action_ids: List[int]
+    is_terminal: bool
+    # None if the state is not terminal
+    result: Optional[Tuple[float, float]]
 
 class AbstractGameState(abc.ABC):
     """
@@ -7,7 +23,21 @@ class AbstractGameState(abc.ABC):
     for two-player, zero-sum games.
 
     Players divided into two groups: 0 and 1.
+
+    States are values: take_action returns a new state and never modifies
+    the old one, and two states of the same class are equal, and hash
+    equally, when they describe the same position and player to move.
+    Games declare their fields in __slots__ and return them from _key.
+    The only states that change are private copies made with
+    InPlaceGameState.copy, which must not be stored in sets or used as
+    dict keys, since their hash changes as they are modified.
     """
+    __slots__ = ('_status',)
+
+    # True for subclasses of InPlaceGameState, whose rollouts can step a
+    # single state in place
+    supports_in_place = False
+
     @abc.abstractmethod
     def get_name(self) -> str:
         """
@@ -51,6 +81,117 @@ class AbstractGameState(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def _key(self) -> tuple:
+        """
+        Returns a tuple of the fields that identify the state, which
+        __eq__ and __hash__ compare.
+        """
+        pass
+
+    def __eq__(self, other: object) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def canonical_form(self) -> Tuple['AbstractGameState', Dict[int, int]]:
+        """
+        Returns (canonical state, action map). States that are reflections
+        or rotations of each other share a canonical state, so caches and
+        solvers can store each class of equivalent positions once.
+        The action map sends each legal action id of this state to the id
+        of the matching action in the canonical state.
+
+        The canonical state may have the other player to move (e.g. when a
+        symmetry swaps the players' roles), so values stored for it must be
+        relative to the player to move. By default a state is its own
+        canonical form.
+        """
+        return self, {action_id: action_id for action_id in self.get_status().legal_action_ids}
+
+    def get_legal_action_ids(self) -> List[int]:
+        """
+        Returns the legal actions from the current state as integer ids.
+
+        An action has the same id in every state of a game, so ids can be
+        used to index arrays or compare moves across states. Games should
+        override the action id methods with a direct encoding; by default,
+        ids are assigned to action strings as they are first seen, which
+        only keeps them stable within a single process.
+        """
+        return [self.action_to_id(action) for action in self.get_legal_actions()]
+
+    def take_action_id(self, action_id: int) -> 'AbstractGameState':
+        """
+        Takes the action with the given id and returns the new state.
+        The id must be one of the ids returned by get_legal_action_ids.
+        """
+        return self.take_action(self.id_to_action(action_id))
+
+    def action_to_id(self, action: str) -> int:
+        """
+        Returns the id of an action string.
+        Raises ValueError if the string is not a well-formed action.
+        """
+        interned = _interned_actions.get(type(self))
+        if interned is not None and action in interned[0]:
+            return interned[0][action]
+        with _interned_actions_lock:
+            ids, actions = _interned_actions.setdefault(type(self), ({}, []))
+            if action not in ids:
+                actions.append(action)
+                ids[action] = len(actions) - 1
+            return ids[action]
+
+    def id_to_action(self, action_id: int) -> str:
+        """
+        Returns the action string of an action id.
+        """
+        return _interned_actions[type(self)][1][action_id]
+
+    def get_status(self) -> GameStatus:
+        """
+        Returns the status of the state, computing it once and caching it
+        on the state. The returned list of action ids must not be modified.
+        """
+        status = getattr(self, '_status', None)
+        if status is None:
+            status = self.compute_status()
+            self._status = status
+        return status
+
+    def compute_status(self) -> GameStatus:
+        """
+        Computes the legal action ids, terminal flag and result of the state
+        in one call, without caching, for states that are only visited once
+        (e.g. during rollouts). Games where is_terminal, get_legal_action_ids
+        and get_result repeat the same work should override this with a
+        single pass.
+        """
+        if self.is_terminal():
+            return GameStatus([], True, self.get_result())
+        return GameStatus(self.get_legal_action_ids(), False, None)
+
+    @abc.abstractmethod
+    def to_int(self) -> int:
+        """
+        Returns a compact non-negative int that identifies the state within
+        its class, so that type(self).from_int(self.to_int()) == self.
+        games/state_codec.py builds byte encodings on top of this.
+        """
+        pass
+
+    @classmethod
+    @abc.abstractmethod
+    def from_int(cls, value: int) -> 'AbstractGameState':
+        """
+        Returns the state whose to_int is value.
+        """
+        pass
+
     @abc.abstractmethod
     def is_terminal(self) -> bool:
         """
@@ -87,4 +228,41 @@ class AbstractGameState(abc.ABC):
         showing a string with the current state of the game and
         whose turn it is to move in an easy-to-read format.
         """
-        pass
\ No newline at end of file
+        pass
+
+class InPlaceGameState(AbstractGameState):
+    """
+    A game state that can also be modified in place, so that rollouts can
+    play out a single private copy with apply_action_id and undo_action
+    instead of allocating a new state per ply.
+    """
+    __slots__ = ()
+
+    supports_in_place = True
+
+    @abc.abstractmethod
+    def copy(self, undoable: bool = True) -> 'InPlaceGameState':
+        """
+        Returns a private, mutable copy of the state, which apply_action_id
+        and undo_action may then modify in place. States returned by
+        take_action are shared and must never be modified.
+        If undoable is False, apply_action_id skips recording the history
+        that undo_action needs, for copies that are thrown away after use.
+        Use compute_status rather than get_status on a copy, since a cached
+        status would go stale when the copy is modified.
+        """
+        pass
+
+    @abc.abstractmethod
+    def apply_action_id(self, action_id: int) -> None:
+        """
+        Applies a legal action to a state returned by copy, in place.
+        """
+        pass
+
+    @abc.abstractmethod
+    def undo_action(self) -> None:
+        """
+        Undoes the last action applied with apply_action_id.
+        """
+        pass
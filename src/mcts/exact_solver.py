@@ -0,0 +1,51 @@
+import random
+from typing import Dict, List
+
+from mcts.abstract_game import AbstractGameState
+
+class ExactSolver:
+    """
+    Memoized negamax solver for the small games in this repo.
+
+    Values are from the perspective of the player to move:
+    1.0 for a win, 0.0 for a draw, -1.0 for a loss with perfect play.
+    """
+    def __init__(self):
+        # Keyed by canonical state, so symmetric positions are solved once
+        self.cache: Dict[AbstractGameState, float] = {}
+
+    def value(self, state: AbstractGameState) -> float:
+        key, _ = state.canonical_form()
+        if key in self.cache:
+            return self.cache[key]
+
+        player = state.get_player_to_move()
+        if state.is_terminal():
+            value = state.get_result()[player]
+        else:
+            value = -1.0
+            for action in state.get_legal_actions():
+                value = max(value, self.action_value(state, action))
+                if value == 1.0:
+                    break
+
+        self.cache[key] = value
+        return value
+
+    def action_value(self, state: AbstractGameState, action: str) -> float:
+        """Value of taking action in state, for the player to move in state"""
+        child = state.take_action(action)
+        child_value = self.value(child)
+        if child.get_player_to_move() == state.get_player_to_move():
+            return child_value
+        return -child_value
+
+    def best_actions(self, state: AbstractGameState) -> List[str]:
+        """Returns all actions that keep the best achievable value"""
+        values = {action: self.action_value(state, action) for action in state.get_legal_actions()}
+        best = max(values.values())
+        return [action for action, value in values.items() if value == best]
+
+    def get_action(self, state: AbstractGameState) -> str:
+        """Returns a random optimal action"""
+        return random.choice(self.best_actions(state))
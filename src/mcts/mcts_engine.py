@@ -1,22 +1,64 @@
 import math
 import random
 
-from typing import Tuple
+from typing import Callable, List, Optional, Tuple
 
 from mcts.abstract_game import AbstractGameState
 from mcts.mcts_node import MCTSNode
 
 class MCTSEngine:
-    def __init__(self, exploration_constant: float = 1.0):
+    def __init__(
+            self,
+            exploration_constant: float = 1.0,
+            widening_constant: Optional[float] = None,
+            widening_exponent: float = 0.5,
+            prior_fn: Optional[Callable[[AbstractGameState, List[str]], List[float]]] = None,
+            max_nodes: Optional[int] = None
+        ):
+        """
+        Args:
+            exploration_constant: UCB1 exploration constant
+            widening_constant: If set, enables progressive widening: a node with
+                n visits may have at most ceil(widening_constant * n ** widening_exponent)
+                children, and children are added one at a time as visits grow.
+                If None (default), all legal actions are expanded at once.
+            widening_exponent: Exponent used by progressive widening
+            prior_fn: Optional function returning a prior for each legal action of a state.
+                With progressive widening, children are added in descending prior order;
+                without priors they are added in random order.
+            max_nodes: If set, the maximum number of nodes kept in the tree.
+                When an expansion would exceed it, the least-visited subtrees
+                whose children are all leaves are first collapsed back into
+                their parent, which keeps the aggregate visits and scores. If
+                that does not make room, the rollout starts from the unexpanded
+                node instead. The root is always expanded.
+        """
         self.exploration_constant = exploration_constant
+        self.widening_constant = widening_constant
+        self.widening_exponent = widening_exponent
+        self.prior_fn = prior_fn
+        self.max_nodes = max_nodes
+        self.node_count = 0
+        # (root, node_count) when evict last failed to make room. Nothing
+        # more can be collapsed until the tree grows, so it is not retried
+        # before then.
+        self._evict_failed_at = None
 
-    def search(self, state: AbstractGameState, iterations: int):
-        root = MCTSNode(state)
+    def search(self, state: AbstractGameState, iterations: int, root: Optional[MCTSNode] = None):
+        """
+        Searches state and returns the best action.
 
-        for _ in range(iterations):
-            node = self.select(root)
-            score = self.simulate(node.state)
-            self.backpropagate(node, score)
+        If root is given (e.g. a subtree kept from pondering) it must hold state,
+        and its existing visits count towards iterations.
+        """
+        if root is None:
+            root = MCTSNode(state)
+            self.node_count = 1
+        else:
+            self.node_count = root.count_nodes()
+
+        while root.visits < iterations:
+            self.iterate(root)
 
         self.root = root
 
@@ -26,10 +68,31 @@ class MCTSEngine:
 
         return self.get_best_action(state.get_player_to_move(), root)
 
+    def iterate(self, root: MCTSNode):
+        """Runs a single select / simulate / backpropagate iteration from root"""
+        node = self.select(root)
+        score = self.simulate(node.state)
+        self.backpropagate(node, score)
+
     def select(self, node: MCTSNode):
-        while not node.state.is_terminal():
-            if not node.is_fully_expanded():
-                return self.expand(node)
+        root = node
+        while not node.is_terminal:
+            num_new = 0
+            if self.widening_constant is not None:
+                if self.can_widen(node):
+                    num_new = 1
+            elif not node.is_fully_expanded():
+                num_new = len(node.state.get_status().legal_action_ids)
+            if num_new:
+                # The root is always expanded, since the search picks one of its children
+                if self.max_nodes is None or node is root or self.node_count + num_new <= self.max_nodes:
+                    return self.widen(node) if self.widening_constant is not None else self.expand(node)
+                if self.try_evict(root, num_new):
+                    # Eviction may have collapsed node's ancestors, so select again
+                    node = root
+                    continue
+                # No room, so the rollout starts from the unexpanded node
+                return node
             node = node.best_child(
                 node.state.get_player_to_move(),
                 self.exploration_constant
@@ -39,17 +102,60 @@ class MCTSEngine:
     def expand(self, parent_node: MCTSNode):
         assert parent_node.children == []
         parent_node.children = [
-            MCTSNode(parent_node.state.take_action(action), parent_node)
-            for action
-            in parent_node.state.get_legal_actions()
+            MCTSNode(parent_node.state.take_action_id(action_id), parent_node, action_id)
+            for action_id
+            in parent_node.state.get_status().legal_action_ids
         ]
+        self.node_count += len(parent_node.children)
         return random.choice(parent_node.children)
 
+    def can_widen(self, node: MCTSNode) -> bool:
+        """Returns True if progressive widening allows node another child"""
+        if node.untried_actions is None:
+            node.untried_actions = self.order_actions(node.state)
+        if not node.untried_actions:
+            return False
+        max_children = max(1, math.ceil(self.widening_constant * node.visits ** self.widening_exponent))
+        return len(node.children) < max_children
+
+    def widen(self, parent_node: MCTSNode):
+        """Adds the next untried action of parent_node as a child and returns it"""
+        action_id = parent_node.untried_actions.pop()
+        child = MCTSNode(parent_node.state.take_action_id(action_id), parent_node, action_id)
+        parent_node.children.append(child)
+        self.node_count += 1
+        return child
+
+    def order_actions(self, state: AbstractGameState) -> List[int]:
+        """
+        Returns the legal action ids of state in the reverse of the order
+        they should be expanded, so the next one can be popped off the end.
+        """
+        action_ids = list(state.get_status().legal_action_ids)
+        if self.prior_fn is None:
+            random.shuffle(action_ids)
+            return action_ids
+        priors = self.prior_fn(state, [state.id_to_action(action_id) for action_id in action_ids])
+        order = sorted(range(len(action_ids)), key=lambda i: priors[i])
+        return [action_ids[i] for i in order]
+
     def simulate(self, state: AbstractGameState):
-        while not state.is_terminal():
-            action = random.choice(state.get_legal_actions())
-            state = state.take_action(action)
-        return state.get_result()
+        if state.supports_in_place:
+            # Copy the leaf once, then step the copy without allocating new
+            # states; the copy is thrown away, so it keeps no undo history
+            state = state.copy(undoable=False)
+            status = state.compute_status()
+            while not status.is_terminal:
+                state.apply_action_id(random.choice(status.legal_action_ids))
+                status = state.compute_status()
+            return status.result
+
+        # Rollout states are thrown away, so their status is not cached
+        status = state.compute_status()
+        while not status.is_terminal:
+            state = state.take_action_id(random.choice(status.legal_action_ids))
+            status = state.compute_status()
+        return status.result
 
     def backpropagate(self, node: MCTSNode, score: Tuple[float, float]):
         while node is not None:
@@ -58,7 +164,57 @@ class MCTSEngine:
             node.total_score[1] += score[1]
             node = node.parent
 
+    def try_evict(self, root: MCTSNode, num_new: int) -> bool:
+        """
+        Evicts cold subtrees to make room for num_new more nodes, unless that
+        already failed and the tree has not grown since. Returns True if
+        eviction was tried.
+        """
+        if self._evict_failed_at == (root, self.node_count):
+            return False
+        self.evict(root, num_new)
+        if self.node_count + num_new > self.max_nodes:
+            self._evict_failed_at = (root, self.node_count)
+        return True
+
+    def evict(self, root: MCTSNode, num_new: int = 0):
+        """
+        Collapses cold subtrees until the tree holds at most 90% of max_nodes,
+        and few enough nodes that num_new more still fit within max_nodes.
+
+        Only nodes whose children are all leaves are collapsed, least-visited
+        first, so the collapsed node becomes a leaf that keeps the stats of its
+        former children and can be re-expanded if search comes back to it.
+        The root's children are never removed.
+        """
+        target = min(int(self.max_nodes * 0.9), self.max_nodes - num_new)
+        while self.node_count > target:
+            candidates = []
+            stack = [child for child in root.children]
+            while stack:
+                node = stack.pop()
+                if not node.children:
+                    continue
+                if all(not child.children for child in node.children):
+                    candidates.append(node)
+                else:
+                    stack.extend(node.children)
+            if not candidates:
+                return
+            candidates.sort(key=lambda node: node.visits)
+            for node in candidates:
+                self.node_count -= len(node.children)
+                node.children = []
+                node.untried_actions = None
+                if self.node_count <= target:
+                    return
+
+    def get_visit_counts(self, root: MCTSNode = None) -> List[Tuple[str, int]]:
+        """Returns (action, visits) for each child of root (default: the last searched root)"""
+        root = root if root is not None else self.root
+        return [(root.state.id_to_action(child.action_id), child.visits) for child in root.children]
+
     def get_best_action(self, perspective, root: MCTSNode):
         best_child = max(root.children, key=lambda child: child.visits)
-        return root.state.get_legal_actions()[root.children.index(best_child)]
-    
\ No newline at end of file
+        return root.state.id_to_action(best_child.action_id)
+
@@ -0,0 +1,114 @@
+import asyncio
+import random
+
+from mcts.mcts_engine import MCTSEngine
+from mcts.mcts_ponder import Ponderer
+from mcts.mcts_pool import MCTSPool
+from games.book_nim import BookNim, BookNimHard
+from games.count_twenty_one import CountToTwentyOne
+
+def test_full_expansion_default():
+    engine = MCTSEngine()
+    action = engine.search(CountToTwentyOne(), 200)
+    assert action in CountToTwentyOne().get_legal_actions()
+    assert len(engine.root.children) == 3
+
+def test_progressive_widening_limits_children():
+    random.seed(0)
+    state = BookNim([30, 30, 30])
+    engine = MCTSEngine(widening_constant=1.0, widening_exponent=0.5)
+    action = engine.search(state, 400)
+    assert action in state.get_legal_actions()
+    # 90 legal actions, but only ~sqrt(400) children may be added
+    assert len(engine.root.children) <= 21
+    for child in engine.root.children:
+        assert len(child.children) <= max(1, child.visits ** 0.5 + 1)
+
+def test_progressive_widening_uses_priors():
+    state = BookNim([30, 30, 30])
+    preferred = "2,30"
+    engine = MCTSEngine(
+        widening_constant=1.0,
+        prior_fn=lambda s, actions: [1.0 if a == preferred else 0.0 for a in actions]
+    )
+    engine.search(state, 1)
+    assert [state.id_to_action(child.action_id) for child in engine.root.children] == [preferred]
+
+def test_node_budget_evicts_cold_subtrees():
+    random.seed(0)
+    state = BookNim([5, 6, 7])
+    engine = MCTSEngine(max_nodes=300)
+    action = engine.search(state, 2000)
+    assert action in state.get_legal_actions()
+    assert engine.node_count <= 300
+
+    def count(node):
+        return 1 + sum(count(child) for child in node.children)
+    assert count(engine.root) == engine.node_count
+    # Collapsed subtrees keep their stats in the parent
+    assert engine.root.visits == 2000
+    assert sum(child.visits for child in engine.root.children) == 2000
+
+def test_node_budget_stops_expanding_when_nothing_can_be_evicted():
+    random.seed(0)
+    # The 18 children of the root can't be evicted, and no other node's
+    # children fit in the remaining budget
+    state = BookNim([5, 6, 7])
+    engine = MCTSEngine(max_nodes=25)
+    evictions = []
+    evict = engine.evict
+    engine.evict = lambda root, num_new: evictions.append(evict(root, num_new))
+    action = engine.search(state, 2000)
+    assert action in state.get_legal_actions()
+    assert engine.node_count == engine.root.count_nodes() <= 25
+    assert engine.root.visits == 2000
+    # A failed eviction is not retried until the tree grows
+    assert len(evictions) == 1
+
+def test_node_budget_makes_room_for_wide_expansions():
+    random.seed(0)
+    # Nodes have up to 11 children, well over the 10% of the budget that
+    # evicting down to 90% of max_nodes would free
+    state = BookNimHard()
+    engine = MCTSEngine(max_nodes=60)
+    engine.search(state, 2000)
+    num_children = []
+    expand = engine.expand
+    def counting_expand(node):
+        child = expand(node)
+        num_children.append(len(node.children))
+        return child
+    engine.expand = counting_expand
+    for _ in range(2000):
+        engine.iterate(engine.root)
+    # Wide nodes keep being expanded, with eviction making room for them
+    wide = [n for n in num_children if n >= 9]
+    assert len(wide) >= len(num_children) // 10
+    assert engine.node_count == engine.root.count_nodes() <= 60
+
+def test_search_reuses_pondered_subtree():
+    state = CountToTwentyOne()
+    ponderer = Ponderer(state, max_iterations=3000).start()
+    ponderer.join()
+    assert ponderer.root.visits == 3000
+    root = ponderer.subtree("2")
+    assert root is not None and root.parent is None
+    assert root.visits > 0
+
+    next_state = state.take_action("2")
+    engine = MCTSEngine()
+    action = engine.search(next_state, root.visits, root=root)
+    # The pondered visits already cover the budget, so no new iterations run
+    assert engine.root is root
+    assert action in next_state.get_legal_actions()
+
+def test_pool_search_returns_legal_action():
+    state = BookNim([5, 6, 7])
+    pool = MCTSPool(max_workers=2, module_names=["games.book_nim"])
+    try:
+        async def search_both():
+            return await asyncio.gather(pool.search(state, 200), pool.search(state, 200))
+        for action in asyncio.run(search_both()):
+            assert action in state.get_legal_actions()
+    finally:
+        pool.shutdown()
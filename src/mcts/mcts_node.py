@@ -4,16 +4,21 @@ import random
 from mcts.abstract_game import AbstractGameState
 
 class MCTSNode:
-    def __init__(self, state: AbstractGameState, parent: 'MCTSNode' = None):
+    def __init__(self, state: AbstractGameState, parent: 'MCTSNode' = None, action_id: int = None):
         self.state = state
         self.parent = parent
+        # The id of the action that led from the parent to this node
+        self.action_id = action_id
         self.children = []
+        # Ids of actions not yet expanded, in the reverse of the order
+        # they will be added; only used with progressive widening
+        self.untried_actions = None
         self.visits = 0
         self.total_score = [0, 0]
-        self.is_terminal = state.is_terminal()
+        self.is_terminal = state.get_status().is_terminal
 
     def is_fully_expanded(self):
-        return len(self.children) == len(self.state.get_legal_actions())
+        return len(self.children) == len(self.state.get_status().legal_action_ids)
 
     def best_child(self, perspective, exploration_constant: float = 1.0):
         return max(self.children, key=lambda child: child.ucb1_score(perspective, exploration_constant))
@@ -25,6 +30,15 @@ class MCTSNode:
         exploration_term = exploration_constant * math.sqrt(math.log(self.parent.visits) / (1.0 + self.visits))
         return exploitation_term + exploration_term
     
+    def count_nodes(self):
+        count = 0
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            count += 1
+            stack.extend(node.children)
+        return count
+
     def percent_terminal_leafs(self):
         if len(self.children) > 0:
             total = 0
@@ -35,4 +49,4 @@ class MCTSNode:
                 is_terminal += is_terminal_s
             return total, is_terminal
         else:
-            return 1, 1 if self.is_terminal else 0
\ No newline at end of file
+            return 1, 1 if self.is_terminal else 0
@@ -0,0 +1,57 @@
+import threading
+from typing import Optional
+
+from mcts.abstract_game import AbstractGameState
+from mcts.mcts_engine import MCTSEngine
+from mcts.mcts_node import MCTSNode
+
+class Ponderer:
+    """
+    Searches a position in a background thread while the other player is
+    thinking about their move, so that the subtree for the move they
+    actually make can be reused by the next search.
+    """
+    def __init__(self, state: AbstractGameState, max_iterations: int, engine: MCTSEngine = None):
+        self.engine = engine if engine is not None else MCTSEngine()
+        self.root = MCTSNode(state)
+        self.max_iterations = max_iterations
+        self.exception = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+
+    def start(self) -> 'Ponderer':
+        self.engine.node_count = 1
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            while not self._stop.is_set() and self.root.visits < self.max_iterations:
+                self.engine.iterate(self.root)
+        except Exception as e:
+            self.exception = e
+
+    def join(self):
+        """Waits until pondering has run max_iterations or been stopped"""
+        self._thread.join()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def subtree(self, action: str) -> Optional[MCTSNode]:
+        """
+        Stops pondering and returns the subtree reached by action, detached
+        from the rest of the tree, or None if it was never expanded.
+        """
+        self.stop()
+        if self.exception is not None:
+            return None
+        action_id = self.root.state.action_to_id(action)
+        for child in self.root.children:
+            if child.action_id == action_id:
+                child.parent = None
+                return child
+        return None
@@ -0,0 +1,51 @@
+import asyncio
+import importlib
+import random
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Iterable, Optional, Set
+
+from mcts.abstract_game import AbstractGameState
+from mcts.mcts_engine import MCTSEngine
+
+def _init_worker(module_names: Iterable[str]):
+    # Import the game modules up front so the first search in each worker
+    # does not pay for it, and reseed so forked workers do not share a
+    # random sequence
+    for module_name in module_names:
+        importlib.import_module(module_name)
+    random.seed()
+
+def _search(state: AbstractGameState, iterations: int) -> str:
+    return MCTSEngine().search(state, iterations)
+
+class MCTSPool:
+    """
+    Runs MCTS searches in worker processes, so that a coroutine can await a
+    search without blocking the event loop or holding the GIL.
+
+    States are pickled to the workers and only the chosen action comes back,
+    so searches cannot start from a pondered subtree.
+    """
+    def __init__(self, max_workers: Optional[int] = None, module_names: Iterable[str] = ()):
+        self._executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(tuple(module_names),)
+        )
+        # Searches submitted but not yet awaited to completion, so that
+        # shutdown can cancel the ones that have not started
+        self._pending: Set[Future] = set()
+
+    async def search(self, state: AbstractGameState, iterations: int) -> str:
+        future = self._executor.submit(_search, state, iterations)
+        self._pending.add(future)
+        try:
+            return await asyncio.wrap_future(future)
+        finally:
+            self._pending.discard(future)
+
+    def shutdown(self):
+        # Executor.shutdown only takes cancel_futures from Python 3.9
+        for future in list(self._pending):
+            future.cancel()
+        self._executor.shutdown()
@@ -0,0 +1,90 @@
+import json
+import os
+import random
+from typing import Dict, Type
+
+from mcts.abstract_game import AbstractGameState
+from mcts.mcts_engine import MCTSEngine
+
+def self_play_game(
+        game_class: Type[AbstractGameState],
+        iterations: int,
+        temperature_plies: int = 0,
+    ) -> Dict:
+    """
+    Plays one game of MCTS against itself and returns a record of it.
+
+    For the first temperature_plies plies the move is sampled in proportion
+    to root visits, so that games from the same position differ; after that
+    the most visited move is played.
+
+    The record holds the actions played, the root visit distribution
+    before each action, and the final result. Positions are recovered by
+    replaying the actions from game_class().
+    """
+    state = game_class()
+    actions = []
+    visits = []
+    while not state.is_terminal():
+        engine = MCTSEngine()
+        action = engine.search(state, iterations)
+        visit_counts = engine.get_visit_counts()
+        if len(actions) < temperature_plies:
+            action = random.choices(
+                [a for a, _ in visit_counts],
+                weights=[n for _, n in visit_counts]
+            )[0]
+        actions.append(action)
+        visits.append(dict(visit_counts))
+        state = state.take_action(action)
+
+    return {
+        "actions": actions,
+        "visits": visits,
+        "result": list(state.get_result()),
+    }
+
+def count_complete_records(path: str) -> int:
+    """
+    Counts the complete records in a shard file, truncating a partially
+    written last line (e.g. from a killed worker) so the shard can be appended to.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'rb+') as f:
+        data = f.read()
+        end = data.rfind(b'\n') + 1
+        if end < len(data):
+            f.truncate(end)
+    return data[:end].count(b'\n')
+
+def write_shard(
+        path: str,
+        game_name: str,
+        game_class: Type[AbstractGameState],
+        shard: int,
+        num_games: int,
+        iterations: int,
+        temperature_plies: int = 0,
+    ) -> int:
+    """
+    Plays games into an append-only JSON-lines shard until it holds num_games
+    records, resuming after any records already written.
+
+    Game i of a shard is seeded from (game_name, shard, i), so a resumed
+    shard plays the same games as an uninterrupted one would.
+    Returns the number of games played.
+    """
+    done = count_complete_records(path)
+    played = 0
+    with open(path, 'a') as f:
+        for index in range(done, num_games):
+            random.seed(f"{game_name}:{shard}:{index}")
+            record = self_play_game(game_class, iterations, temperature_plies)
+            record["game"] = game_name
+            record["shard"] = shard
+            record["index"] = index
+            f.write(json.dumps(record, separators=(',', ':')) + "\n")
+            f.flush()
+            played += 1
+    return played
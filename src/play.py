@@ -1,10 +1,14 @@
 import asyncio
 import argparse
+import os
+from typing import Dict, List, Optional
+
+from llms import http_pool
+from llms.get_llm import close_llms
+from mcts.mcts_pool import MCTSPool
 from play_base import play_single_game
 from play_dataclasses import GameConfig, GameStats
 from games.all_list import win_first_move_games, subset_games
-from save_results import save_results
-import time
 
 #"anthropic:claude-3-5-sonnet-20241022"
 #"anthropic:claude-3-7-sonnet-20250219",
@@ -14,52 +18,107 @@ import time
 #"openai:gpt-4o-2024-11-20",
 #"deepinfra:Qwen/Qwen3-235B-A22B",
 
+def provider_of(model: str) -> str:
+    """The provider prefix of a model name, e.g. 'anthropic' for 'anthropic:claude-3-5-haiku-20241022'"""
+    return model.split(":", 1)[0]
+
+def parse_provider_limits(specs: List[str]) -> Dict[str, int]:
+    """Parses 'provider=N' strings into a dict"""
+    limits = {}
+    for spec in specs:
+        provider, _, limit = spec.partition("=")
+        if not limit.isdigit() or int(limit) < 1:
+            raise ValueError(f"Invalid provider limit: {spec}")
+        limits[provider] = int(limit)
+    return limits
+
+async def play_with_retries(config: GameConfig, game_num: int, semaphore: asyncio.Semaphore, pool: Optional[MCTSPool] = None) -> Optional[GameStats]:
+    """
+    Plays one game, retrying with exponential backoff on errors.
+    The semaphore is only held while a game is being played, not while
+    waiting to retry. Returns None if every attempt failed.
+    """
+    max_attempts = 5
+    exponential_backoff = [0, 20, 60, 180, 300, 600]
+    for attempt in range(max_attempts):
+        await asyncio.sleep(exponential_backoff[attempt])
+        try:
+            async with semaphore:
+                print(f"{config.game_name}: game {game_num + 1} of {config.num_games} (Attempt {attempt + 1}/{max_attempts})")
+                return await play_single_game(config, pool)
+        except Exception as e:
+            if attempt + 1 == max_attempts:
+                print(f"Failed all {max_attempts} attempts for game {game_num + 1} of {config.game_name}: {str(e)}")
+            else:
+                print(f"Attempt {attempt + 1} failed for game {game_num + 1} of {config.game_name}: {str(e)}")
+    return None
+
+async def play_all(configs: List[GameConfig], max_concurrent: int, provider_limits: Dict[str, int], pool: Optional[MCTSPool] = None) -> List[GameStats]:
+    """
+    Plays every game of every config concurrently, with at most
+    max_concurrent games in flight per provider (or the provider's own
+    limit from provider_limits). If pool is given, the MCTS opponent's
+    searches run in it.
+    """
+    # Games played in the terminal share stdin, so they must take turns
+    provider_limits = {"human_terminal": 1, **provider_limits}
+    semaphores: Dict[str, asyncio.Semaphore] = {}
+    games = []
+    for config in configs:
+        provider = provider_of(config.model)
+        if provider not in semaphores:
+            semaphores[provider] = asyncio.Semaphore(provider_limits.get(provider, max_concurrent))
+        for game_num in range(config.num_games):
+            games.append(play_with_retries(config, game_num, semaphores[provider], pool))
+    return [stats for stats in await asyncio.gather(*games) if stats is not None]
+
 async def main():
     # Set up command line argument parsing
     parser = argparse.ArgumentParser(description='Run games with specified AI model')
     parser.add_argument('--model_name', type=str, help='Name of the AI model to use, prefixed by the LLM provider (e.g. anthropic:claude-3-5-haiku-20241022)')
     parser.add_argument('--num_games', type=int, default=8, help='Number of games to play')
+    parser.add_argument('--ponder', action='store_true', help='Let the MCTS opponent search while the LLM is thinking (results then depend on LLM latency)')
+    parser.add_argument('--max_concurrent', type=int, default=8, help='Maximum number of games in flight per LLM provider')
+    parser.add_argument('--mcts_workers', type=int, default=os.cpu_count(), help='Number of processes for MCTS searches, or 0 to search in the main process (which allows pondering)')
+    parser.add_argument('--provider_limit', type=str, nargs='*', default=[], help="Per-provider overrides of --max_concurrent, e.g. 'anthropic=4'")
+    parser.add_argument('--max_connections', type=int, default=100, help='Maximum open HTTP connections shared by the aiohttp-based providers (0 for no limit)')
+    parser.add_argument('--max_connections_per_host', type=int, default=0, help='Maximum open HTTP connections per host (0 for no limit)')
     args = parser.parse_args()
+    if args.ponder and args.mcts_workers > 0:
+        parser.error("--ponder needs --mcts_workers 0, since pondering keeps the search tree in the main process")
+    http_pool.configure(args.max_connections, args.max_connections_per_host)
+    provider_limits = parse_provider_limits(args.provider_limit)
 
     configs = [
         GameConfig(
-            run_name=f"{game_config['name']}_{args.model_name}_{game_config['mcts_iterations']}mcts",
-            game_class=game_config['game_class'],
+            run_name=f"{game_config.name}_{args.model_name}_{game_config.mcts_iterations}mcts",
+            game_class=game_config.game_class,
             model=args.model_name,
-            game_name=game_config['name'],
+            game_name=game_config.name,
             num_games=args.num_games,
-            mcts_iterations=game_config['mcts_iterations']
+            mcts_iterations=game_config.mcts_iterations,
+            ponder=args.ponder
         )
         for game_config in win_first_move_games
     ]
     
+    pool = None
+    if args.mcts_workers > 0:
+        pool = MCTSPool(args.mcts_workers, {game_config.class_path.split(':')[0] for game_config in win_first_move_games})
     try:
-        results = []
         for config in configs:
             print(f"{config.num_games} games {config.game_name} with {config.model}")
-            for game_num in range(config.num_games):
-                attempts = 0
-                max_attempts = 5
-                exponential_backoff = [0, 20, 60, 180, 300, 600]
-                while attempts < max_attempts:
-                    time.sleep(exponential_backoff[attempts])
-                    try:
-                        print(f"Game {game_num + 1} of {config.num_games} (Attempt {attempts + 1}/{max_attempts})")
-                        stats = await play_single_game(config)
-                        results.append(stats)
-                        break  # Success - exit retry loop
-                    except Exception as e:
-                        attempts += 1
-                        if attempts == max_attempts:
-                            print(f"Failed all {max_attempts} attempts for game {game_num + 1} of {config.game_name}: {str(e)}")
-                        else:
-                            print(f"Attempt {attempts} failed for game {game_num + 1} of {config.game_name}: {str(e)}")
-                            print(e)
-                            continue
-        
+        results = await play_all(configs, args.max_concurrent, provider_limits, pool)
+
+        # Imported here since it pulls in pandas, which nothing before this needs
+        from save_results import save_results
         save_results(results)
     except Exception as e:
         print(f"Fatal error in main execution: {str(e)}")
+    finally:
+        await close_llms()
+        if pool is not None:
+            pool.shutdown()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -1,13 +1,19 @@
 import time
 import os
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from llms.get_llm import get_llm
 from mcts.abstract_game import AbstractGameState
 from mcts.mcts_engine import MCTSEngine
+from mcts.mcts_node import MCTSNode
+from mcts.mcts_ponder import Ponderer
+from mcts.mcts_pool import MCTSPool
 from play_dataclasses import GameConfig, GameStats
 
-async def play_single_game(config: GameConfig) -> GameStats:
+async def play_single_game(config: GameConfig, pool: Optional[MCTSPool] = None) -> GameStats:
+    if config.ponder and pool is not None:
+        # Pondering keeps its tree in this process, so pooled searches can't reuse it
+        raise ValueError("Pondering can't be used with an MCTS pool")
     state = config.game_class()
     game_name = config.game_name
     
@@ -16,12 +22,26 @@ async def play_single_game(config: GameConfig) -> GameStats:
         {"role": "user", "content": create_system_prompt(state) + "\n" + create_turn_prompt(state)}
     ]
     move_history = []
+    # Subtree searched by the opponent while the LLM was thinking
+    ponder_root = None
 
     while not state.is_terminal():
         if state.get_player_to_move() == 0:  # LLM's turn (X)
-            state, messages, invalid, move_history = await handle_llm_turn(
-                config.model, state, messages, game_name, move_history
-            )
+            # Keep the opponent searching while we wait on the LLM, with enough
+            # iterations that every reply gets a full budget on average
+            ponderer = None
+            if config.ponder:
+                max_iterations = config.mcts_iterations * len(state.get_legal_actions())
+                ponderer = Ponderer(state, max_iterations).start()
+            try:
+                state, messages, invalid, move_history = await handle_llm_turn(
+                    config.model, state, messages, game_name, move_history
+                )
+            finally:
+                if ponderer is not None:
+                    ponderer.stop()
+            if ponderer is not None and not invalid:
+                ponder_root = ponderer.subtree(move_history[-1][0])
             if invalid:
                 return GameStats(
                     run_name=config.run_name,
@@ -34,9 +54,10 @@ async def play_single_game(config: GameConfig) -> GameStats:
                     messages=messages
                 )
         else:  # MCTS turn (O)
-            state, messages, move_history = handle_mcts_turn(
-                state, messages, config.mcts_iterations, move_history
-            )        
+            state, messages, move_history = await handle_mcts_turn(
+                state, messages, config.mcts_iterations, move_history, root=ponder_root, pool=pool
+            )
+            ponder_root = None
     result = state.get_result()
     wins = 1 if result[0] > 0 else 0
     losses = 1 if result[0] < 0 else 0
@@ -117,14 +138,19 @@ async def handle_llm_turn(
         print(f"Invalid move in {game_name}")
         return state, messages, 1, move_history
 
-def handle_mcts_turn(
+async def handle_mcts_turn(
     state: AbstractGameState,
     messages: List[Dict[str, str]],
     mcts_iterations: int,
-    move_history: List[Tuple[str, AbstractGameState]]
+    move_history: List[Tuple[str, AbstractGameState]],
+    root: MCTSNode = None,
+    pool: Optional[MCTSPool] = None
 ) -> Tuple[AbstractGameState, List[Dict[str, str]], List[Tuple[str, AbstractGameState]]]:
-    engine = MCTSEngine()
-    move = engine.search(state, mcts_iterations)
+    if pool is not None:
+        move = await pool.search(state, mcts_iterations)
+    else:
+        engine = MCTSEngine()
+        move = engine.search(state, mcts_iterations, root=root)
     state_after_move = state.take_action(move)
     
     # Update history
@@ -148,7 +174,13 @@ async def get_llm_move(
     llm = get_llm(model)
     response = await llm(messages)
     #print(response)
-    
+    return response, parse_llm_move(state, response)
+
+def parse_llm_move(state: AbstractGameState, response: str) -> str:
+    """
+    Returns the move in the <move> tags of response.
+    Raises ValueError if there is none or it is not legal in state.
+    """
     # Extract move from XML tags
     start_tag = "<move>"
     end_tag = "</move>"
@@ -159,7 +191,10 @@ async def get_llm_move(
         raise ValueError("No valid move found in response")
     
     move = response[start_idx:end_idx].strip()
-    if move not in state.get_legal_actions():
+    # Parse the move rather than looking it up in get_legal_actions, which
+    # may list only one of several ways to write the same move (e.g. Grundy's
+    # Game lists one split per heap size, larger part first)
+    if state.action_to_id(move) not in state.get_status().legal_action_ids:
         raise ValueError(f"Invalid move: {move}")
     
-    return response, move
\ No newline at end of file
+    return move
\ No newline at end of file
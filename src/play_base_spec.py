@@ -0,0 +1,12 @@
+import pytest
+
+from games.grundys_game import GrundysGame
+from play_base import parse_llm_move
+
+def test_parse_llm_move_accepts_any_spelling_of_a_legal_move():
+    state = GrundysGame([11, 5, 5])
+    for move in ["0:10,1", "0:1,10", "1:4,1", "2:1,4"]:
+        assert parse_llm_move(state, f"I'll play <move>{move}</move>") == move
+    for response in ["<move>0:5,5</move>", "<move>3:2,1</move>", "<move>1:3,2", "no move"]:
+        with pytest.raises((ValueError, IndexError)):
+            parse_llm_move(state, response)
@@ -18,6 +18,10 @@ class GameConfig:
     num_games: int
     # The number of MCTS iterations to use
     mcts_iterations: int = 2000
+    # Whether the MCTS opponent keeps searching while the LLM is thinking.
+    # Off by default, since it makes the opponent's search budget depend on
+    # how long the LLM takes, so results are not reproducible
+    ponder: bool = False
 
 @dataclass
 class GameStats:
@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+import play
+from play import parse_provider_limits, play_all
+from play_dataclasses import GameConfig
+
+def test_parse_provider_limits():
+    assert parse_provider_limits(["anthropic=4", "openai=16"]) == {"anthropic": 4, "openai": 16}
+    for spec in ["anthropic", "anthropic=", "anthropic=0", "anthropic=-1", "anthropic=two"]:
+        with pytest.raises(ValueError):
+            parse_provider_limits([spec])
+
+def test_play_all_limits_games_in_flight_per_provider(monkeypatch):
+    running = {"anthropic": 0, "openai": 0}
+    peak = {"anthropic": 0, "openai": 0}
+
+    async def fake_play_single_game(config, pool=None):
+        provider = config.model.split(":")[0]
+        running[provider] += 1
+        peak[provider] = max(peak[provider], running[provider])
+        await asyncio.sleep(0.01)
+        running[provider] -= 1
+        return config.game_name
+
+    monkeypatch.setattr(play, "play_single_game", fake_play_single_game)
+    configs = [
+        GameConfig(run_name=model, game_class=None, model=model, game_name=f"{model} {i}", num_games=6)
+        for model in ["anthropic:a", "anthropic:b", "openai:c"]
+        for i in range(2)
+    ]
+    results = asyncio.run(play_all(configs, max_concurrent=3, provider_limits={"openai": 2}))
+    assert len(results) == 36
+    # The two anthropic models share one limit
+    assert peak == {"anthropic": 3, "openai": 2}
@@ -0,0 +1,55 @@
+import argparse
+import multiprocessing
+import os
+import re
+import time
+
+from mcts.mcts_self_play import write_shard
+from games.all_list import win_first_move_games
+
+def shard_path(output_dir: str, game_name: str, shard: int) -> str:
+    game_dir = re.sub(r'[^a-z0-9]+', '_', game_name.lower()).strip('_')
+    return os.path.join(output_dir, game_dir, f"shard-{shard:05d}.jsonl")
+
+def _write_shard(args):
+    game_index, shard, games_per_shard, iterations, temperature_plies, output_dir = args
+    game_config = win_first_move_games[game_index]
+    path = shard_path(output_dir, game_config.name, shard)
+    played = write_shard(
+        path,
+        game_config.name,
+        game_config.game_class,
+        shard,
+        games_per_shard,
+        iterations if iterations is not None else game_config.mcts_iterations,
+        temperature_plies,
+    )
+    return game_config.name, shard, played
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate MCTS self-play data for the games in games/all_list.py')
+    parser.add_argument('--games', type=str, nargs='*', help='Names of games to generate data for (default: all)')
+    parser.add_argument('--num_shards', type=int, default=8, help='Number of shards per game')
+    parser.add_argument('--games_per_shard', type=int, default=100, help='Number of games per shard')
+    parser.add_argument('--iterations', type=int, default=None, help="MCTS iterations per move (default: each game's mcts_iterations)")
+    parser.add_argument('--temperature_plies', type=int, default=4, help='Number of opening plies sampled in proportion to visits')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count(), help='Number of worker processes')
+    parser.add_argument('--output_dir', type=str, default='self_play', help='Directory to write shards to')
+    args = parser.parse_args()
+
+    tasks = []
+    for game_index, game_config in enumerate(win_first_move_games):
+        if args.games and game_config.name not in args.games:
+            continue
+        os.makedirs(os.path.dirname(shard_path(args.output_dir, game_config.name, 0)), exist_ok=True)
+        for shard in range(args.num_shards):
+            tasks.append((game_index, shard, args.games_per_shard, args.iterations, args.temperature_plies, args.output_dir))
+
+    # Re-running with the same arguments skips finished shards and resumes partial ones
+    start_time = time.time()
+    with multiprocessing.Pool(args.workers) as pool:
+        for game_name, shard, played in pool.imap_unordered(_write_shard, tasks):
+            print(f"{game_name} shard {shard}: played {played} games ({time.time() - start_time:.0f}s)")
+
+if __name__ == "__main__":
+    main()
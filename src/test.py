@@ -11,7 +11,7 @@ def test_game_properties():
     games = [game_config for game_config in win_first_move_games]
 
     for game_config in games:
-        game, iters = game_config["game_class"], game_config["mcts_iterations"]
+        game, iters = game_config.game_class, game_config.mcts_iterations
         game_name = game().get_name()
         print(f"\nTesting {game_name}")
 